@@ -8,8 +8,154 @@ Seguindo padrão Agno Framework
 from agno.agent import Agent
 from agno.models.anthropic import Claude
 from agno.tools.toolkit import Toolkit
-from typing import List, Dict, Any
+from bisect import bisect_left
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, Set, FrozenSet, Mapping, Final, NamedTuple, Tuple
 import json
+import os
+import re
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Exibição das chamadas de ferramentas apenas em modo de depuração (IA_TRIB_DEBUG=1)
+SHOW_TOOL_CALLS = os.getenv("IA_TRIB_DEBUG") == "1"
+
+# Vocabulário de classificação das consultas (a ordem de TIPOS define a prioridade)
+TIPOS: Final[Mapping[str, FrozenSet[str]]] = MappingProxyType({
+    "residencia_fiscal": frozenset({"residência", "residencia", "domicílio", "domicilio"}),
+    "tratados": frozenset({"tratado", "bitributação", "dupla tributação", "tie-breaker"}),
+    "planejamento": frozenset({"planejamento", "estratégia", "otimização", "estrutura"}),
+    "cfc": frozenset({"cfc", "controlled foreign", "transparência fiscal", "lei 14754"}),
+    "compliance": frozenset({"fatca", "crs", "common reporting", "troca informações"}),
+    "exit_tax": frozenset({"exit tax", "saída do país", "desenquadramento"})
+})
+
+PAISES: Final[Mapping[str, FrozenSet[str]]] = MappingProxyType({
+    "brasil": frozenset({"brasil", "brasileiro", "br"}),
+    "portugal": frozenset({"portugal", "português", "pt"}),
+    "uruguai": frozenset({"uruguai", "uruguaio"}),
+    "paraguai": frozenset({"paraguai", "paraguaio"}),
+    "espanha": frozenset({"espanha", "espanhol"}),
+    "eua": frozenset({"eua", "estados unidos", "america", "usa"}),
+    "alemanha": frozenset({"alemanha", "alemão", "german"}),
+    "frança": frozenset({"frança", "francês", "french"})
+})
+
+PALAVRAS_COMPLEXAS: Final[FrozenSet[str]] = frozenset({"estrutura", "holding", "offshore", "planejamento", "otimização"})
+
+CONCEITOS_MAP: Final[Mapping[str, FrozenSet[str]]] = MappingProxyType({
+    "residência fiscal": frozenset({"residencia", "domicilio", "183 dias", "centro interesses"}),
+    "tratados bitributação": frozenset({"tratado", "dupla tributacao", "tie-breaker"}),
+    "planejamento tributário": frozenset({"planejamento", "estrategia", "otimizacao"}),
+    "CFC": frozenset({"cfc", "controlled foreign", "transparencia fiscal"}),
+    "FATCA/CRS": frozenset({"fatca", "crs", "common reporting", "troca informacoes"}),
+    "exit tax": frozenset({"exit tax", "saida do pais", "desenquadramento"})
+})
+
+# Cada bucket de palavras-chave vira uma categoria do automato
+_CATEGORIAS = {
+    "tipo": TIPOS,
+    "pais": PAISES,
+    "complexa": {palavra: frozenset({palavra}) for palavra in PALAVRAS_COMPLEXAS},
+    "conceito": CONCEITOS_MAP
+}
+
+def _construir_automato():
+    """Constrói o automato Aho-Corasick com todas as palavras-chave"""
+    rotulos_por_palavra: Dict[str, Set] = {}
+    for categoria, buckets in _CATEGORIAS.items():
+        for rotulo, palavras in buckets.items():
+            for palavra in palavras:
+                rotulos_por_palavra.setdefault(palavra, set()).add((categoria, rotulo))
+    
+    automato = ahocorasick.Automaton()
+    for palavra, rotulos in rotulos_por_palavra.items():
+        automato.add_word(palavra, tuple(rotulos))
+    automato.make_automaton()
+    return automato
+
+_AUTOMATO = _construir_automato() if AHOCORASICK_AVAILABLE else None
+
+# Fallback sem pyahocorasick: uma única regex por categoria, com um grupo nomeado por
+# rótulo dentro de um lookahead, para que finditer visite cada posição uma única vez e
+# reporte o rótulo via lastgroup (palavras de rótulos distintos não são prefixo umas das outras)
+def _compilar_categoria(buckets: Mapping[str, FrozenSet[str]]) -> Tuple["re.Pattern", Dict[str, str]]:
+    """Compila os buckets de uma categoria em uma regex com grupos nomeados"""
+    grupos = {f"r{i}": rotulo for i, rotulo in enumerate(buckets)}
+    alternativas = "|".join(
+        f"(?P<{grupo}>{'|'.join(map(re.escape, sorted(buckets[rotulo], key=len, reverse=True)))})"
+        for grupo, rotulo in grupos.items()
+    )
+    return re.compile(f"(?=(?:{alternativas}))"), grupos
+
+_PADROES = {categoria: _compilar_categoria(buckets) for categoria, buckets in _CATEGORIAS.items()}
+
+def _classificar_termos(consulta_lower: str) -> Dict[str, Set[str]]:
+    """Identifica em uma única passada os rótulos de cada categoria presentes na consulta"""
+    encontrados = {categoria: set() for categoria in _CATEGORIAS}
+    
+    if _AUTOMATO is not None:
+        for _, rotulos in _AUTOMATO.iter(consulta_lower):
+            for categoria, rotulo in rotulos:
+                encontrados[categoria].add(rotulo)
+        return encontrados
+    
+    for categoria, (padrao, grupos) in _PADROES.items():
+        rotulos = encontrados[categoria]
+        for match in padrao.finditer(consulta_lower):
+            rotulos.add(grupos[match.lastgroup])
+    return encontrados
+
+# Índice ordenado (palavra, categoria, rótulo) de países e conceitos: funciona como
+# uma trie compacta, com busca por prefixo em O(log n + k) via bisect
+_INDICE_TERMOS: Tuple[Tuple[str, str, str], ...] = tuple(sorted(
+    (palavra, categoria, rotulo)
+    for categoria, buckets in (("pais", PAISES), ("conceito", CONCEITOS_MAP))
+    for rotulo, palavras in buckets.items()
+    for palavra in palavras
+))
+_CHAVES_INDICE = tuple(palavra for palavra, _, _ in _INDICE_TERMOS)
+
+# Tipos de consulta que somam complexidade
+_TIPOS_COMPLEXOS: Final[FrozenSet[str]] = frozenset({"planejamento", "cfc", "tratados"})
+
+# Tipos de consulta que sempre envolvem o Brasil como jurisdição de referência
+_TIPOS_COM_BRASIL: Final[FrozenSet[str]] = frozenset({"residencia_fiscal", "tratados"})
+
+# Pesos dos fatores de complexidade, na ordem dos bits da máscara:
+# vários países, tipo complexo, consulta longa, palavra complexa
+_PESOS_COMPLEXIDADE = (2, 2, 1, 2)
+
+# Nível de complexidade pré-calculado para cada uma das 16 combinações de fatores
+_NIVEL_POR_MASCARA = tuple(
+    "alta" if pontuacao >= 5 else "media" if pontuacao >= 3 else "baixa"
+    for pontuacao in (
+        sum(peso for bit, peso in enumerate(_PESOS_COMPLEXIDADE) if mascara >> bit & 1)
+        for mascara in range(1 << len(_PESOS_COMPLEXIDADE))
+    )
+)
+
+class ConsultaPreparada(NamedTuple):
+    """Pré-processamento da consulta compartilhado entre as ferramentas"""
+    consulta_lower: str
+    termos: Mapping[str, FrozenSet[str]]
+    total_palavras: int
+
+@lru_cache(maxsize=256)
+def _preparar_consulta(consulta: str) -> ConsultaPreparada:
+    """Normaliza, classifica e conta as palavras da consulta uma única vez"""
+    consulta_lower = consulta.lower()
+    termos = _classificar_termos(consulta_lower)
+    return ConsultaPreparada(
+        consulta_lower=consulta_lower,
+        termos=MappingProxyType({categoria: frozenset(rotulos) for categoria, rotulos in termos.items()}),
+        total_palavras=len(consulta.split())
+    )
 
 class ConsultorTributarioTools(Toolkit):
     """Ferramentas especializadas do Consultor Tributário"""
@@ -21,53 +167,28 @@ class ConsultorTributarioTools(Toolkit):
                 self.analisar_consulta,
                 self.identificar_jurisdicoes,
                 self.classificar_complexidade,
-                self.extrair_conceitos_chave
+                self.extrair_conceitos_chave,
+                self.sugerir_termos
             ]
         )
     
     @staticmethod
     def analisar_consulta(consulta: str) -> Dict[str, Any]:
         """Analisa a consulta tributária e identifica elementos principais"""
-        consulta_lower = consulta.lower()
+        preparada = _preparar_consulta(consulta)
+        termos = preparada.termos
         
-        # Identificar tipo de consulta
-        tipos = {
-            "residencia_fiscal": ["residência", "residencia", "domicílio", "domicilio"],
-            "tratados": ["tratado", "bitributação", "dupla tributação", "tie-breaker"],
-            "planejamento": ["planejamento", "estratégia", "otimização", "estrutura"],
-            "cfc": ["cfc", "controlled foreign", "transparência fiscal", "lei 14754"],
-            "compliance": ["fatca", "crs", "common reporting", "troca informações"],
-            "exit_tax": ["exit tax", "saída do país", "desenquadramento"]
-        }
-        
-        tipo_identificado = "geral"
-        for tipo, palavras in tipos.items():
-            if any(palavra in consulta_lower for palavra in palavras):
-                tipo_identificado = tipo
-                break
+        # Identificar tipo de consulta (primeiro tipo na ordem de prioridade)
+        tipo_identificado = next((tipo for tipo in TIPOS if tipo in termos["tipo"]), "geral")
         
         # Identificar países mencionados
-        paises = {
-            "brasil": ["brasil", "brasileiro", "br"],
-            "portugal": ["portugal", "português", "pt"],
-            "uruguai": ["uruguai", "uruguaio"],
-            "paraguai": ["paraguai", "paraguaio"],
-            "espanha": ["espanha", "espanhol"],
-            "eua": ["eua", "estados unidos", "america", "usa"],
-            "alemanha": ["alemanha", "alemão", "german"],
-            "frança": ["frança", "francês", "french"]
-        }
-        
-        paises_identificados = []
-        for pais, variantes in paises.items():
-            if any(variante in consulta_lower for variante in variantes):
-                paises_identificados.append(pais)
+        paises_identificados = [pais for pais in PAISES if pais in termos["pais"]]
         
         return {
             "tipo_consulta": tipo_identificado,
             "paises": paises_identificados,
             "consulta_original": consulta,
-            "necessita_pesquisa_detalhada": len(consulta.split()) > 10
+            "necessita_pesquisa_detalhada": preparada.total_palavras > 10
         }
     
     @staticmethod
@@ -79,60 +200,51 @@ class ConsultorTributarioTools(Toolkit):
         # Adicionar jurisdições relevantes baseado no tipo
         jurisdicoes_relevantes = set(paises)
         
-        if tipo == "residencia_fiscal":
-            jurisdicoes_relevantes.update(["brasil"])  # Sempre incluir Brasil como referência
-        
-        if tipo == "tratados":
-            jurisdicoes_relevantes.update(["brasil"])  # Brasil como base
+        if tipo in _TIPOS_COM_BRASIL:
+            jurisdicoes_relevantes.add("brasil")  # Brasil como referência/base
         
         return list(jurisdicoes_relevantes)
     
     @staticmethod
     def classificar_complexidade(consulta: str, analise: Dict[str, Any]) -> str:
         """Classifica a complexidade da consulta"""
-        pontuacao = 0
-        
-        # Fatores de complexidade
-        if len(analise.get("paises", [])) > 1:
-            pontuacao += 2
-        
-        if analise.get("tipo_consulta") in ["planejamento", "cfc", "tratados"]:
-            pontuacao += 2
+        preparada = _preparar_consulta(consulta)
         
-        if len(consulta.split()) > 20:
-            pontuacao += 1
-        
-        palavras_complexas = ["estrutura", "holding", "offshore", "planejamento", "otimização"]
-        if any(palavra in consulta.lower() for palavra in palavras_complexas):
-            pontuacao += 2
-        
-        if pontuacao >= 5:
-            return "alta"
-        elif pontuacao >= 3:
-            return "media"
-        else:
-            return "baixa"
+        # Cada fator de complexidade ocupa um bit; a tabela devolve o nível direto
+        mascara = (
+            (len(analise.get("paises", [])) > 1)
+            | (analise.get("tipo_consulta") in _TIPOS_COMPLEXOS) << 1
+            | (preparada.total_palavras > 20) << 2
+            | (not PALAVRAS_COMPLEXAS.isdisjoint(preparada.termos["complexa"])) << 3
+        )
+        return _NIVEL_POR_MASCARA[mascara]
     
     @staticmethod
     def extrair_conceitos_chave(consulta: str) -> List[str]:
         """Extrai conceitos-chave para orientar a pesquisa"""
-        conceitos_map = {
-            "residência fiscal": ["residencia", "domicilio", "183 dias", "centro interesses"],
-            "tratados bitributação": ["tratado", "dupla tributacao", "tie-breaker"],
-            "planejamento tributário": ["planejamento", "estrategia", "otimizacao"],
-            "CFC": ["cfc", "controlled foreign", "transparencia fiscal"],
-            "FATCA/CRS": ["fatca", "crs", "common reporting", "troca informacoes"],
-            "exit tax": ["exit tax", "saida do pais", "desenquadramento"]
-        }
+        termos = _preparar_consulta(consulta).termos
+        conceitos_encontrados = [conceito for conceito in CONCEITOS_MAP if conceito in termos["conceito"]]
         
-        consulta_lower = consulta.lower()
-        conceitos_encontrados = []
+        return conceitos_encontrados or ["tributação internacional"]
+    
+    @staticmethod
+    def sugerir_termos(prefixo: str, limite: int = 10) -> List[Dict[str, str]]:
+        """Sugere países e conceitos conhecidos que começam com o prefixo informado"""
+        prefixo = prefixo.lower().strip()
+        if not prefixo:
+            return []
         
-        for conceito, palavras in conceitos_map.items():
-            if any(palavra in consulta_lower for palavra in palavras):
-                conceitos_encontrados.append(conceito)
+        sugestoes = []
+        for indice in range(bisect_left(_CHAVES_INDICE, prefixo), len(_INDICE_TERMOS)):
+            palavra, categoria, rotulo = _INDICE_TERMOS[indice]
+            if not palavra.startswith(prefixo) or len(sugestoes) >= limite:
+                break
+            sugestoes.append({"termo": palavra, "categoria": categoria, "rotulo": rotulo})
         
-        return conceitos_encontrados or ["tributação internacional"]
+        return sugestoes
+
+# Toolkit sem estado, compartilhado por todos os agentes criados
+_CONSULTOR_TOOLS = ConsultorTributarioTools()
 
 def criar_agente_consultor():
     """Cria e configura o Agente Consultor Tributário"""
@@ -140,7 +252,7 @@ def criar_agente_consultor():
     return Agent(
         name="Consultor Tributário Internacional",
         model=Claude(id="claude-sonnet-4-20250514"),
-        tools=[ConsultorTributarioTools()],
+        tools=[_CONSULTOR_TOOLS],
         description="""
         Sou um advogado especializado em Direito Tributário Internacional, responsável por:
         - Analisar consultas tributárias complexas
@@ -164,7 +276,7 @@ def criar_agente_consultor():
         
         NÃO faça afirmações sobre legislação específica sem pesquisa prévia.
         """,
-        show_tool_calls=True,
+        show_tool_calls=SHOW_TOOL_CALLS,
         markdown=True
     )
 
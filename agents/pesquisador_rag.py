@@ -8,25 +8,75 @@ Seguindo padrão Agno Framework
 from agno.agent import Agent
 from agno.models.anthropic import Claude
 from agno.tools.toolkit import Toolkit
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Set
+from collections import OrderedDict
 import chromadb
+import numpy as np
+from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 import os
 import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Exibição das chamadas de ferramentas apenas em modo de depuração (IA_TRIB_DEBUG=1)
+SHOW_TOOL_CALLS = os.getenv("IA_TRIB_DEBUG") == "1"
+
+def configure_performance_environment():
+    """Ajusta o runtime de inferência (ONNX/tokenizers) uma única vez, sem sobrescrever o ambiente"""
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+    os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 2) // 2)))
+    os.environ.setdefault("ORT_LOGGING_LEVEL", "3")
+
+configure_performance_environment()
+
+# Modelo de embedding padrão do ChromaDB, usado na indexação da coleção
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Funções de embedding compartilhadas entre instâncias (o modelo é carregado uma única vez)
+_EMBEDDING_CACHE: Dict[str, Any] = {}
+_EMBEDDINGS_AQUECIDOS: Set[str] = set()
+_EMBEDDING_LOCK = threading.RLock()
+
+def _obter_funcao_embedding(preload: bool = False):
+    """Retorna a função de embedding em cache, opcionalmente já aquecida"""
+    with _EMBEDDING_LOCK:
+        funcao = _EMBEDDING_CACHE.get(EMBEDDING_MODEL)
+        if funcao is None:
+            funcao = embedding_functions.DefaultEmbeddingFunction()
+            _EMBEDDING_CACHE[EMBEDDING_MODEL] = funcao
+        
+        if preload and EMBEDDING_MODEL not in _EMBEDDINGS_AQUECIDOS:
+            # Primeira inferência carrega pesos e sessão ONNX fora do caminho da consulta
+            funcao(["warmup"])
+            _EMBEDDINGS_AQUECIDOS.add(EMBEDDING_MODEL)
+        
+        return funcao
 
 class PesquisadorRAGTools(Toolkit):
     """Ferramentas especializadas do Pesquisador RAG"""
     
-    def __init__(self, chromadb_path: str = None):
+    # Máximo de consultas mantidas no cache LRU de resultados
+    CACHE_MAXSIZE = 512
+    
+    def __init__(self, chromadb_path: str = None, preload_model: bool = True):
         if not chromadb_path:
             chromadb_path = "/Users/esausamuellimafeitosa/meus-projetos-claude/projetos-python/sistema-agentes-tributarios/data/chromadb"
         
         self.chromadb_path = chromadb_path
+        self.preload_model = preload_model
         self.collection = self._setup_chromadb()
+        self._cache_consultas: "OrderedDict[Tuple[str, int, int], Tuple[Dict[str, Any], ...]]" = OrderedDict()
+        # A instância é compartilhada entre agentes e threads (_RAG_TOOLS)
+        self._cache_lock = threading.Lock()
         
         super().__init__(
             name="pesquisador_rag_tools",
             tools=[
                 self.buscar_documentos,
+                self.buscar_multiplas,
                 self.buscar_por_pais,
                 self.buscar_conceito_especifico,
                 self.obter_fontes_relevantes,
@@ -37,47 +87,132 @@ class PesquisadorRAGTools(Toolkit):
     def _setup_chromadb(self):
         """Configura conexão com ChromaDB"""
         try:
-            client = chromadb.PersistentClient(path=self.chromadb_path)
-            collection = client.get_collection("tributacao_internacional_rag")
-            return collection
+            client = chromadb.PersistentClient(
+                path=self.chromadb_path,
+                settings=Settings(allow_reset=False)
+            )
+            collection = client.get_collection(
+                "tributacao_internacional_rag",
+                embedding_function=_obter_funcao_embedding()
+            )
         except Exception as e:
-            print(f"Erro ao conectar ChromaDB: {e}")
+            logger.warning("Erro ao conectar ChromaDB: %s", e)
             return None
+        
+        if self.preload_model:
+            try:
+                _obter_funcao_embedding(preload=True)
+            except Exception as e:
+                logger.warning("Erro ao pré-carregar modelo de embedding: %s", e)
+        
+        return collection
     
     def buscar_documentos(self, query: str, n_results: int = 5) -> Dict[str, Any]:
         """Busca documentos relevantes na base de conhecimento"""
         if not self.collection:
             return {"erro": "ChromaDB não disponível", "resultados": []}
         
+        query = " ".join(query.split())
+        
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                include=['documents', 'metadatas', 'distances']
-            )
-            
-            documentos = []
-            if results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    metadata = results['metadatas'][0][i] if results['metadatas'] else {}
-                    distance = results['distances'][0][i] if results['distances'] else 1.0
-                    
-                    documentos.append({
-                        "conteudo": doc,
-                        "fonte": metadata.get('source_document', 'Desconhecida'),
-                        "relevancia": 1 - distance,  # Converter distância em relevância
-                        "metadata": metadata
-                    })
+            documentos = self._consultar_em_lote([query], n_results)[query]
             
             return {
                 "query": query,
                 "total_encontrados": len(documentos),
-                "resultados": documentos
+                "resultados": [dict(documento) for documento in documentos]
             }
             
         except Exception as e:
             return {"erro": f"Erro na busca: {e}", "resultados": []}
     
+    def buscar_multiplas(self, queries: List[str], n_results: int = 5) -> Dict[str, Any]:
+        """Busca várias consultas independentes em uma única chamada ao ChromaDB"""
+        if not self.collection:
+            return {"erro": "ChromaDB não disponível", "buscas": []}
+        
+        queries = [" ".join(query.split()) for query in queries]
+        
+        try:
+            documentos_por_query = self._consultar_em_lote(queries, n_results)
+        except Exception as e:
+            return {"erro": f"Erro na busca: {e}", "buscas": []}
+        
+        buscas = []
+        for query in queries:
+            documentos = documentos_por_query[query]
+            buscas.append({
+                "query": query,
+                "total_encontrados": len(documentos),
+                "resultados": [dict(documento) for documento in documentos]
+            })
+        
+        return {
+            "total_consultas": len(buscas),
+            "buscas": buscas
+        }
+    
+    def _consultar_em_lote(self, queries: List[str], n_results: int) -> Dict[str, Tuple[Dict[str, Any], ...]]:
+        """Resolve as consultas pelo cache e envia as demais ao ChromaDB em um único lote"""
+        documentos_por_query = {}
+        pendentes = []
+        # O tamanho da coleção entra na chave: após reindexar (ex.: integrate_to_chromadb.py),
+        # resultados antigos deixam de ser encontrados e saem pela LRU
+        total_colecao = self.collection.count()
+        
+        with self._cache_lock:
+            for query in queries:
+                chave = (query, n_results, total_colecao)
+                documentos = self._cache_consultas.get(chave)
+                if documentos is not None:
+                    self._cache_consultas.move_to_end(chave)
+                    documentos_por_query[query] = documentos
+                elif query not in pendentes:
+                    pendentes.append(query)
+        
+        if pendentes:
+            results = self.collection.query(
+                query_texts=pendentes,
+                n_results=n_results,
+                include=['documents', 'metadatas', 'distances']
+            )
+            for indice, query in enumerate(pendentes):
+                documentos = self._extrair_documentos(results, indice)
+                self._armazenar_cache((query, n_results, total_colecao), documentos)
+                documentos_por_query[query] = documentos
+        
+        return documentos_por_query
+    
+    @staticmethod
+    def _extrair_documentos(results: Dict[str, Any], indice: int) -> Tuple[Dict[str, Any], ...]:
+        """Converte a resposta do ChromaDB para uma consulta em lista de documentos"""
+        documentos = []
+        if results['documents'] and results['documents'][indice]:
+            for i, doc in enumerate(results['documents'][indice]):
+                metadata = results['metadatas'][indice][i] if results['metadatas'] else {}
+                distance = results['distances'][indice][i] if results['distances'] else 1.0
+                
+                documentos.append({
+                    "conteudo": doc,
+                    "fonte": metadata.get('source_document', 'Desconhecida'),
+                    "relevancia": 1 - distance,  # Converter distância em relevância
+                    "metadata": metadata
+                })
+        return tuple(documentos)
+    
+    def _armazenar_cache(self, chave: Tuple[str, int, int], documentos: Tuple[Dict[str, Any], ...]):
+        """Guarda resultado no cache LRU, descartando a consulta menos recente"""
+        with self._cache_lock:
+            self._cache_consultas[chave] = documentos
+            self._cache_consultas.move_to_end(chave)
+            if len(self._cache_consultas) > self.CACHE_MAXSIZE:
+                self._cache_consultas.popitem(last=False)
+    
+    def limpar_cache(self):
+        """Descarta resultados em cache (ex.: após reindexar a coleção)"""
+        with self._cache_lock:
+            self._cache_consultas.clear()
+    
     def buscar_por_pais(self, pais: str, conceito: str = "", n_results: int = 3) -> Dict[str, Any]:
         """Busca informações específicas sobre um país"""
         query = f"{pais} {conceito} tributação fiscal residência"
@@ -101,9 +236,9 @@ class PesquisadorRAGTools(Toolkit):
             }
             fontes.append(fonte)
         
-        # Ordenar por relevância
-        fontes.sort(key=lambda x: x["relevancia"], reverse=True)
-        return fontes
+        # Ordenar por relevância (argsort estável preserva a ordem original nos empates)
+        relevancias = np.fromiter((fonte["relevancia"] for fonte in fontes), dtype=np.float64, count=len(fontes))
+        return [fontes[i] for i in np.argsort(-relevancias, kind="stable")]
     
     def validar_informacao(self, afirmacao: str, contexto_pais: str = "") -> Dict[str, Any]:
         """Valida uma afirmação buscando evidências na base"""
@@ -125,13 +260,25 @@ class PesquisadorRAGTools(Toolkit):
             "fonte_primaria": resultados.get("resultados", [{}])[0].get("fonte", "")
         }
 
+# Toolkit compartilhado (cliente ChromaDB e cache de consultas), criado sob demanda
+_RAG_TOOLS: Optional[PesquisadorRAGTools] = None
+_RAG_TOOLS_LOCK = threading.Lock()
+
+def _obter_tools_pesquisador() -> PesquisadorRAGTools:
+    """Retorna o toolkit compartilhado, reconectando se a conexão anterior falhou"""
+    global _RAG_TOOLS
+    with _RAG_TOOLS_LOCK:
+        if _RAG_TOOLS is None or _RAG_TOOLS.collection is None:
+            _RAG_TOOLS = PesquisadorRAGTools()
+        return _RAG_TOOLS
+
 def criar_agente_pesquisador():
     """Cria e configura o Agente Pesquisador RAG"""
     
     return Agent(
         name="Pesquisador RAG Tributário",
         model=Claude(id="claude-sonnet-4-20250514"),
-        tools=[PesquisadorRAGTools()],
+        tools=[_obter_tools_pesquisador()],
         description="""
         Sou um especialista em pesquisa de informações tributárias, responsável por:
         - Buscar informações precisas na base de conhecimento (4.317 chunks)
@@ -147,7 +294,8 @@ def criar_agente_pesquisador():
         3. Cite SEMPRE as fontes específicas encontradas
         4. Para consultas por país, use buscar_por_pais()
         5. Para conceitos específicos, use buscar_conceito_especifico()
-        6. Valide informações importantes com validar_informacao()
+        6. Para várias buscas independentes, use buscar_multiplas() em uma única chamada
+        7. Valide informações importantes com validar_informacao()
         
         FORMATO DE RESPOSTA:
         - Informação encontrada
@@ -158,7 +306,7 @@ def criar_agente_pesquisador():
         NÃO invente informações se não encontrar na base.
         SEMPRE indique quando algo não foi encontrado.
         """,
-        show_tool_calls=True,
+        show_tool_calls=SHOW_TOOL_CALLS,
         markdown=True
     )
 
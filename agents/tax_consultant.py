@@ -3,9 +3,14 @@ Agente Consultor Tributário - Nível 2 RAG.
 Especialista em tributação internacional com base de conhecimento.
 """
 
+import logging
 import os
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import threading
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 try:
     from agno.agent import Agent
@@ -15,12 +20,25 @@ try:
 except ImportError:
     # Fallback para desenvolvimento sem Agno
     AGNO_AVAILABLE = False
-    print("⚠️ Agno não disponível. Usando implementação simplificada.")
+    logger.warning("Agno não disponível. Usando implementação simplificada.")
 
 from ..models.query import TaxQuery, QueryResponse, SourceCitation, QueryType
 from ..core.vector_store import TaxVectorStore
 
 
+# Prefixo das respostas de falha do agente Agno (não devem ir para o cache)
+AGNO_ERROR_PREFIX = "Erro na consulta com agente Agno"
+
+# Exibição das chamadas de ferramentas apenas em modo de depuração (IA_TRIB_DEBUG=1)
+SHOW_TOOL_CALLS = os.getenv("IA_TRIB_DEBUG") == "1"
+
+
+@lru_cache(maxsize=4096)
+def _format_document_title(document_id: str) -> str:
+    """Converte o ID do documento em título legível (cacheado por ID)."""
+    return document_id.replace("_", " ").title()
+
+
 class TaxConsultantTools(Toolkit):
     """Ferramentas especializadas do consultor tributário."""
     
@@ -73,25 +91,24 @@ class TaxConsultantTools(Toolkit):
             if not results:
                 return "Nenhuma informação encontrada na base de conhecimento para esta consulta."
             
-            # Formatar resultados com citações
-            formatted_results = []
+            # Formatar resultados com citações (lista pré-alocada, preenchida por índice)
+            results = results[:max_results]
+            formatted_results = [None] * len(results)
             
-            for i, result in enumerate(results[:max_results], 1):
-                text = result["text"]
+            for i, result in enumerate(results):
                 metadata = result["metadata"]
-                score = result["relevance_score"]
                 
-                # Criar citação
-                citation = f"[Fonte {i}]"
+                # Criar citação a partir de partes, unidas com um único join
+                parts = ["[Fonte ", str(i + 1), "]"]
                 if metadata.get("document_id"):
-                    citation += f" {metadata['document_id'].replace('_', ' ').title()}"
+                    parts += (" ", _format_document_title(metadata["document_id"]))
                 if metadata.get("page_number") and metadata.get("page_number") > 0:
-                    citation += f", página {metadata['page_number']}"
+                    parts += (", página ", str(metadata["page_number"]))
                 if metadata.get("section"):
-                    citation += f", seção: {metadata['section']}"
-                citation += f" (Relevância: {score:.1%})"
+                    parts += (", seção: ", metadata["section"])
+                parts += (" (Relevância: ", format(result["relevance_score"], ".1%"), ")\n", result["text"], "\n")
                 
-                formatted_results.append(f"{citation}\n{text}\n")
+                formatted_results[i] = "".join(parts)
             
             return "\n---\n".join(formatted_results)
             
@@ -173,6 +190,8 @@ class TaxConsultantAgent:
         """
         self.vector_store = vector_store
         self.tools = TaxConsultantTools(vector_store)
+        # O agente Agno guarda estado da execução/sessão na instância: uma execução por vez
+        self._agno_lock = threading.Lock()
         
         # Instruções especializadas do agente
         self.system_instructions = """
@@ -220,12 +239,12 @@ DISCLAIMER OBRIGATÓRIO:
                 tools=[self.tools],
                 description="Especialista em tributação pessoal internacional",
                 instructions=self.system_instructions,
-                show_tool_calls=True,
+                show_tool_calls=SHOW_TOOL_CALLS,
                 markdown=True
             )
-            print("✅ Agente Agno inicializado com sucesso")
+            logger.info("Agente Agno inicializado com sucesso")
         except Exception as e:
-            print(f"⚠️ Erro ao inicializar agente Agno: {e}")
+            logger.warning("Erro ao inicializar agente Agno: %s", e)
             self.agno_agent = None
     
     def query(self, question: str, **kwargs) -> QueryResponse:
@@ -239,7 +258,7 @@ DISCLAIMER OBRIGATÓRIO:
         Returns:
             QueryResponse: Resposta estruturada
         """
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         # Criar query estruturada
         tax_query = TaxQuery(
@@ -251,22 +270,23 @@ DISCLAIMER OBRIGATÓRIO:
         )
         
         try:
+            # Buscar chunks uma única vez para resposta, citações e métricas
+            search_results, degraded_search = self.vector_store.search_with_status(tax_query)
+            
             if self.agno_agent and AGNO_AVAILABLE:
                 # Usar agente Agno
                 response_text = self._query_with_agno(tax_query)
             else:
                 # Usar implementação simplificada
-                response_text = self._query_simplified(tax_query)
-            
-            # Buscar chunks para citações
-            search_results = self.vector_store.search(tax_query)
+                response_text = self._query_simplified(tax_query, search_results)
             
             # Criar citações
             sources = self._create_source_citations(search_results[:5])
             
             # Calcular métricas
-            processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+            processing_time = (time.perf_counter_ns() - start_ns) // 1_000_000
             confidence = self._calculate_response_confidence(search_results, response_text)
+            related_topics, suggested_countries = self._extract_metadata_facets(search_results)
             
             # Criar resposta estruturada
             response = QueryResponse(
@@ -275,9 +295,10 @@ DISCLAIMER OBRIGATÓRIO:
                 sources=sources,
                 search_results_count=len(search_results),
                 processing_time_ms=processing_time,
+                degraded_search=degraded_search,
                 original_query=tax_query,
-                related_topics=self._extract_related_topics(search_results),
-                suggested_countries=self._extract_suggested_countries(search_results),
+                related_topics=related_topics,
+                suggested_countries=suggested_countries,
                 limitations=["Baseado apenas na base de conhecimento disponível",
                            "Informações podem estar desatualizadas",
                            "Não substitui consultoria profissional personalizada"]
@@ -292,7 +313,8 @@ DISCLAIMER OBRIGATÓRIO:
                 confidence_score=0.0,
                 sources=[],
                 search_results_count=0,
-                processing_time_ms=int((datetime.now() - start_time).total_seconds() * 1000),
+                processing_time_ms=(time.perf_counter_ns() - start_ns) // 1_000_000,
+                degraded_search=True,
                 original_query=tax_query,
                 limitations=["Sistema temporariamente indisponível"]
             )
@@ -312,16 +334,14 @@ Por favor, responda com base na base de conhecimento disponível, seguindo as re
 """
         
         try:
-            response = self.agno_agent.run(prompt)
+            with self._agno_lock:
+                response = self.agno_agent.run(prompt)
             return str(response)
         except Exception as e:
-            return f"Erro na consulta com agente Agno: {str(e)}"
+            return f"{AGNO_ERROR_PREFIX}: {str(e)}"
     
-    def _query_simplified(self, tax_query: TaxQuery) -> str:
-        """Implementação simplificada sem Agno."""
-        
-        # Buscar informações relevantes
-        search_results = self.vector_store.search(tax_query)
+    def _query_simplified(self, tax_query: TaxQuery, search_results: List[Dict[str, Any]]) -> str:
+        """Implementação simplificada sem Agno, a partir dos resultados já buscados."""
         
         if not search_results:
             return "Não foram encontradas informações na base de conhecimento para responder a esta consulta."
@@ -352,7 +372,7 @@ ATENÇÃO: Esta resposta é baseada em informações gerais da base de conhecime
             metadata = result["metadata"]
             
             # Determinar título do documento
-            doc_title = metadata.get("document_id", "Documento").replace("_", " ").title()
+            doc_title = _format_document_title(metadata.get("document_id", "Documento"))
             
             citation = SourceCitation(
                 document_id=metadata.get("document_id", "unknown"),
@@ -385,29 +405,25 @@ ATENÇÃO: Esta resposta é baseada em informações gerais da base de conhecime
         
         return min(final_confidence, 1.0)
     
-    def _extract_related_topics(self, search_results: List[Dict]) -> List[str]:
-        """Extrai tópicos relacionados dos resultados."""
-        topics = set()
-        
-        for result in search_results:
-            metadata = result["metadata"]
+    def _extract_metadata_facets(self, search_results: List[Dict]) -> Tuple[List[str], List[str]]:
+        """Extrai tópicos relacionados e países sugeridos em uma única passada."""
+        topics_csv = []
+        countries_csv = []
+        for r in search_results:
+            metadata = r["metadata"]
             if metadata.get("topics"):
-                result_topics = metadata["topics"].split(",")
-                topics.update(t.strip() for t in result_topics if t.strip())
-        
-        return list(topics)[:10]  # Limitar a 10 tópicos
-    
-    def _extract_suggested_countries(self, search_results: List[Dict]) -> List[str]:
-        """Extrai países sugeridos dos resultados."""
-        countries = set()
-        
-        for result in search_results:
-            metadata = result["metadata"]
+                topics_csv.append(metadata["topics"])
             if metadata.get("countries"):
-                result_countries = metadata["countries"].split(",")
-                countries.update(c.strip() for c in result_countries if c.strip())
+                countries_csv.append(metadata["countries"])
+        
+        # Junta os campos CSV e divide uma única vez em vez de um split por resultado
+        topics = {t.strip() for t in ",".join(topics_csv).split(",")}
+        topics.discard("")
+        countries = {c.strip() for c in ",".join(countries_csv).split(",")}
+        countries.discard("")
         
-        return list(countries)[:8]  # Limitar a 8 países
+        # Limitar a 10 tópicos e 8 países
+        return list(topics)[:10], list(countries)[:8]
     
     def get_status(self) -> Dict[str, Any]:
         """Retorna status do agente."""
@@ -8,10 +8,250 @@ Seguindo padrão Agno Framework
 from agno.agent import Agent
 from agno.models.anthropic import Claude
 from agno.tools.toolkit import Toolkit
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from itertools import combinations
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Mapping, Final, FrozenSet, Tuple
 import json
+import os
+import re
+import sys
 from datetime import datetime
 
+# Exibição das chamadas de ferramentas apenas em modo de depuração (IA_TRIB_DEBUG=1)
+SHOW_TOOL_CALLS = os.getenv("IA_TRIB_DEBUG") == "1"
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Princípios fundamentais do direito tributário internacional (a ordem define a prioridade do tipo)
+_PRINCIPIOS_VALIDACAO: Final[Mapping[str, Tuple[str, ...]]] = MappingProxyType({
+    "residencia_fiscal": (
+        "Teste dos 183 dias deve ser específico por jurisdição",
+        "Centro de interesses vitais deve ser demonstrável",
+        "Nacionalidade é critério subsidiário na maioria dos países"
+    ),
+    "tratados": (
+        "Tratados prevalecem sobre legislação interna",
+        "Tie-breakers seguem ordem hierárquica específica",
+        "Procedimento amigável deve estar disponível"
+    ),
+    "cfc": (
+        "Regras CFC aplicam-se apenas a controladas",
+        "Alíquota efetiva deve ser considerada",
+        "Exceções por atividade operacional existem"
+    )
+})
+
+# Matriz de conflitos conhecidos entre pares de jurisdições
+_CONFLITOS_COMUNS: Final[Mapping[Tuple[str, str], Mapping[str, str]]] = MappingProxyType({
+    ("brasil", "portugal"): MappingProxyType({
+        "area": "residencia_fiscal",
+        "risco": "medio",
+        "solucao": "Tratado Brasil-Portugal, tie-breakers aplicáveis"
+    }),
+    ("brasil", "uruguai"): MappingProxyType({
+        "area": "residencia_fiscal",
+        "risco": "baixo",
+        "solucao": "Tratado vigente, sistema territorial uruguaio facilita"
+    }),
+    ("brasil", "paraguai"): MappingProxyType({
+        "area": "residencia_fiscal", 
+        "risco": "baixo",
+        "solucao": "Sistema territorial paraguaio, poucos conflitos"
+    }),
+    ("brasil", "eua"): MappingProxyType({
+        "area": "compliance",
+        "risco": "alto",
+        "solucao": "FATCA obrigatório, tratado aplicável"
+    })
+})
+
+_RECOMENDACOES_CONFLITO: Final[Tuple[str, ...]] = (
+    "Verificar tratados específicos vigentes",
+    "Analisar tie-breakers aplicáveis",
+    "Considerar procedimento amigável se necessário"
+)
+
+# Base de mudanças normativas conhecidas 2024-2025
+_MUDANCAS_RECENTES: Final[Mapping[str, Mapping[str, str]]] = MappingProxyType({
+    "portugal": MappingProxyType({
+        "2024": "Fim do regime NHR, introdução do IFICI",
+        "status": "alterado_significativamente"
+    }),
+    "brasil": MappingProxyType({
+        "2023": "Lei 14.754/2023 - novas regras CFC",
+        "status": "alterado_recentemente"
+    }),
+    "uruguai": MappingProxyType({
+        "2024": "Manutenção do sistema territorial",
+        "status": "estavel"
+    }),
+    "paraguai": MappingProxyType({
+        "2024": "Sistema territorial mantido, CRS implementado",
+        "status": "estavel_com_compliance"
+    })
+})
+
+_MUDANCA_NAO_MAPEADA: Final[Mapping[str, str]] = MappingProxyType({
+    "status": "verificar_atualizacoes",
+    "observacao": "Informações podem necessitar verificação adicional"
+})
+
+# Base de tratados conhecidos (simplificada)
+_TRATADOS_VIGENTES: Final[Mapping[Tuple[str, str], Mapping[str, Any]]] = MappingProxyType({
+    ("brasil", "portugal"): MappingProxyType({"vigente": True, "ano": "2000", "atualizado": "2022"}),
+    ("brasil", "uruguai"): MappingProxyType({"vigente": True, "ano": "2019", "atualizado": "2019"}),
+    ("brasil", "paraguai"): MappingProxyType({"vigente": False, "observacao": "Não há tratado específico"}),
+    ("brasil", "espanha"): MappingProxyType({"vigente": True, "ano": "1974", "atualizado": "revisão pendente"}),
+    ("brasil", "alemanha"): MappingProxyType({"vigente": True, "ano": "1975", "atualizado": "2021"}),
+    ("brasil", "eua"): MappingProxyType({"vigente": False, "observacao": "Acordo limitado para transporte"})
+})
+
+# Base simplificada de precedentes importantes
+_PRECEDENTES: Final[Mapping[str, Mapping[str, Tuple[str, ...]]]] = MappingProxyType({
+    "brasil": MappingProxyType({
+        "residencia_fiscal": (
+            "CARF: Conceito de centro de interesses vitais",
+            "STJ: Aplicação do teste dos 183 dias",
+            "RFB: Posicionamento sobre residência presumida"
+        ),
+        "tratados": (
+            "CARF: Interpretação de tie-breakers",
+            "STF: Hierarquia dos tratados tributários"
+        )
+    }),
+    "portugal": MappingProxyType({
+        "residencia_fiscal": (
+            "AT: Critérios de demonstração de vínculos",
+            "STA: Presunção de residência por cônjuge/filhos"
+        )
+    })
+})
+
+# Anos que caracterizam uma fonte como atualizada (uma única busca por documento)
+_ANO_RECENTE_RE = re.compile("2024|2025")
+
+# Índice par não ordenado -> (posição na matriz, combinação original, detalhes)
+_INDICE_CONFLITOS: Dict[FrozenSet[str], Tuple[int, Tuple[str, str], Mapping[str, str]]] = {
+    frozenset(combinacao): (ordem, combinacao, detalhes)
+    for ordem, (combinacao, detalhes) in enumerate(_CONFLITOS_COMUNS.items())
+}
+
+_TIPOS_VALIDACAO = tuple(_PRINCIPIOS_VALIDACAO)
+
+# Palavra-gatilho (partes do nome do tipo) -> índice do tipo de maior prioridade que a contém
+_GATILHOS_TIPO: Dict[str, int] = {
+    palavra: indice
+    for indice, tipo in reversed(tuple(enumerate(_TIPOS_VALIDACAO)))
+    for palavra in tipo.split('_')
+}
+
+def _construir_automato_tipos():
+    """Constrói o automato Aho-Corasick das palavras-gatilho de tipo"""
+    automato = ahocorasick.Automaton()
+    for palavra, indice in _GATILHOS_TIPO.items():
+        automato.add_word(palavra, indice)
+    automato.make_automaton()
+    return automato
+
+_AUTOMATO_TIPOS = _construir_automato_tipos() if AHOCORASICK_AVAILABLE else None
+
+# Fallback sem pyahocorasick: uma alternação regex (em lookahead, para não perder sobreposições)
+_PADRAO_TIPOS = re.compile(f"(?=({'|'.join(map(re.escape, _GATILHOS_TIPO))}))")
+
+def _identificar_tipo_informacao(info_lower: str) -> str:
+    """Identifica em uma única passada o tipo de informação de maior prioridade"""
+    if _AUTOMATO_TIPOS is not None:
+        indices = (indice for _, indice in _AUTOMATO_TIPOS.iter(info_lower))
+    else:
+        indices = (_GATILHOS_TIPO[match.group(1)] for match in _PADRAO_TIPOS.finditer(info_lower))
+    
+    melhor = len(_TIPOS_VALIDACAO)
+    for indice in indices:
+        if indice < melhor:
+            melhor = indice
+            if melhor == 0:
+                break
+    return _TIPOS_VALIDACAO[melhor] if melhor < len(_TIPOS_VALIDACAO) else "geral"
+
+@lru_cache(maxsize=256)
+def _norm_country(pais: str) -> str:
+    """Forma canônica (minúscula, sem espaços nas bordas e internada) do nome do país"""
+    return sys.intern(pais.strip().lower())
+
+# Consultas às bases constantes são puras: memoizadas com cache limitado. Os resultados
+# em cache guardam listas como tuplas e nunca são devolvidos diretamente (ver _copiar_resultado)
+@lru_cache(maxsize=1024)
+def _atualizacao_normativa(pais: str, area_tributaria: str) -> Dict[str, Any]:
+    """Situação normativa do país, sem a data da verificação"""
+    pais_info = _MUDANCAS_RECENTES.get(_norm_country(pais), _MUDANCA_NAO_MAPEADA)
+    
+    return {
+        "pais": pais,
+        "area": area_tributaria,
+        "status_normativo": pais_info.get("status", "desconhecido"),
+        "ultima_alteracao": pais_info.get("2024", pais_info.get("2023", "Não identificada")),
+        "necessita_verificacao": pais_info.get("status") == "verificar_atualizacoes"
+    }
+
+@lru_cache(maxsize=1024)
+def _aplicabilidade_tratado(pais_origem: str, pais_destino: str, tipo_renda: str) -> Dict[str, Any]:
+    """Aplicabilidade do tratado entre os dois países"""
+    origem, destino = _norm_country(pais_origem), _norm_country(pais_destino)
+    chave = (origem, destino)
+    chave_inversa = (destino, origem)
+    
+    tratado_info = _TRATADOS_VIGENTES.get(chave) or _TRATADOS_VIGENTES.get(chave_inversa)
+    
+    if not tratado_info:
+        return {
+            "aplicavel": False,
+            "motivo": "Tratado não identificado na base",
+            "alternativas": ("Verificar legislação interna", "Consultar Receita Federal")
+        }
+    
+    if not tratado_info.get("vigente"):
+        return {
+            "aplicavel": False,
+            "motivo": tratado_info.get("observacao", "Tratado não vigente"),
+            "alternativas": ("Aplicar legislação interna", "Verificar acordos multilaterais")
+        }
+    
+    return {
+        "aplicavel": True,
+        "tratado": f"Tratado {pais_origem.title()}-{pais_destino.title()}",
+        "ano_assinatura": tratado_info.get("ano"),
+        "ultima_atualizacao": tratado_info.get("atualizado"),
+        "tipo_renda": tipo_renda,
+        "proximos_passos": (
+            "Verificar texto específico do tratado",
+            "Aplicar tie-breakers se necessário",
+            "Considerar procedimento amigável para casos complexos"
+        )
+    }
+
+@lru_cache(maxsize=1024)
+def _precedentes(jurisdicao: str, conceito: str) -> Dict[str, Any]:
+    """Precedentes da base interna para a jurisdição e o conceito"""
+    precedentes = _PRECEDENTES.get(_norm_country(jurisdicao), {}).get(conceito.lower(), ())
+    
+    return {
+        "jurisdicao": jurisdicao,
+        "conceito": conceito,
+        "precedentes_encontrados": len(precedentes),
+        "precedentes": precedentes,
+        "relevancia": "alta" if precedentes else "consultar_diretamente",
+        "observacao": "Precedentes encontrados na base interna" if precedentes else "Verificar jurisprudência atualizada"
+    }
+
+def _copiar_resultado(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia do resultado em cache, com as tuplas convertidas de volta em listas"""
+    return {chave: list(valor) if isinstance(valor, tuple) else valor for chave, valor in resultado.items()}
+
 class ValidadorJuridicoTools(Toolkit):
     """Ferramentas especializadas do Validador Jurídico"""
     
@@ -31,56 +271,29 @@ class ValidadorJuridicoTools(Toolkit):
     def validar_consistencia_legal(informacao: str, jurisdicao: str, fontes: List[Dict]) -> Dict[str, Any]:
         """Valida a consistência legal da informação"""
         
-        # Princípios fundamentais do direito tributário internacional
-        principios_validacao = {
-            "residencia_fiscal": [
-                "Teste dos 183 dias deve ser específico por jurisdição",
-                "Centro de interesses vitais deve ser demonstrável",
-                "Nacionalidade é critério subsidiário na maioria dos países"
-            ],
-            "tratados": [
-                "Tratados prevalecem sobre legislação interna",
-                "Tie-breakers seguem ordem hierárquica específica",
-                "Procedimento amigável deve estar disponível"
-            ],
-            "cfc": [
-                "Regras CFC aplicam-se apenas a controladas",
-                "Alíquota efetiva deve ser considerada",
-                "Exceções por atividade operacional existem"
-            ]
-        }
-        
         # Identificar tipo de informação
         info_lower = informacao.lower()
-        tipo_identificado = "geral"
-        
-        for tipo, criterios in principios_validacao.items():
-            if any(palavra in info_lower for palavra in tipo.split('_')):
-                tipo_identificado = tipo
-                break
+        tipo_identificado = _identificar_tipo_informacao(info_lower)
         
         # Score de consistência baseado nas fontes
         score_consistencia = 0
         alertas = []
         
         # Verificar qualidade das fontes
-        fontes_primarias = [f for f in fontes if f.get("relevancia", 0) > 0.8]
-        if len(fontes_primarias) >= 2:
+        fontes_primarias = sum(1 for f in fontes if f.get("relevancia", 0) > 0.8)
+        if fontes_primarias >= 2:
             score_consistencia += 0.4
         else:
             alertas.append("Poucas fontes primárias de alta relevância")
         
         # Verificar consistência temporal
-        ano_atual = datetime.now().year
-        for fonte in fontes:
-            if "2024" in fonte.get("documento", "") or "2025" in fonte.get("documento", ""):
-                score_consistencia += 0.3
-                break
+        if any(_ANO_RECENTE_RE.search(f.get("documento", "")) for f in fontes):
+            score_consistencia += 0.3
         else:
             alertas.append("Verificar atualização das informações")
         
         # Verificar jurisdição específica
-        if jurisdicao.lower() in informacao.lower():
+        if _norm_country(jurisdicao) in info_lower:
             score_consistencia += 0.3
         else:
             alertas.append(f"Informação pode não ser específica para {jurisdicao}")
@@ -91,7 +304,7 @@ class ValidadorJuridicoTools(Toolkit):
             "tipo_informacao": tipo_identificado,
             "score_consistencia": min(score_consistencia, 1.0),
             "alertas": alertas,
-            "principios_aplicaveis": principios_validacao.get(tipo_identificado, []),
+            "principios_aplicaveis": list(_PRINCIPIOS_VALIDACAO.get(tipo_identificado, ())),
             "recomendacao": "aprovada" if score_consistencia > 0.7 else "revisao_necessaria"
         }
     
@@ -99,39 +312,9 @@ class ValidadorJuridicoTools(Toolkit):
     def verificar_atualizacao_normativa(pais: str, area_tributaria: str) -> Dict[str, Any]:
         """Verifica se há atualizações normativas recentes"""
         
-        # Base de mudanças conhecidas 2024-2025
-        mudancas_recentes = {
-            "portugal": {
-                "2024": "Fim do regime NHR, introdução do IFICI",
-                "status": "alterado_significativamente"
-            },
-            "brasil": {
-                "2023": "Lei 14.754/2023 - novas regras CFC",
-                "status": "alterado_recentemente"
-            },
-            "uruguai": {
-                "2024": "Manutenção do sistema territorial",
-                "status": "estavel"
-            },
-            "paraguai": {
-                "2024": "Sistema territorial mantido, CRS implementado",
-                "status": "estavel_com_compliance"
-            }
-        }
-        
-        pais_info = mudancas_recentes.get(pais.lower(), {
-            "status": "verificar_atualizacoes",
-            "observacao": "Informações podem necessitar verificação adicional"
-        })
-        
-        return {
-            "pais": pais,
-            "area": area_tributaria,
-            "status_normativo": pais_info.get("status", "desconhecido"),
-            "ultima_alteracao": pais_info.get("2024", pais_info.get("2023", "Não identificada")),
-            "necessita_verificacao": pais_info.get("status") == "verificar_atualizacoes",
-            "data_verificacao": datetime.now().strftime("%Y-%m-%d")
-        }
+        resultado = _copiar_resultado(_atualizacao_normativa(pais, area_tributaria))
+        resultado["data_verificacao"] = datetime.now().strftime("%Y-%m-%d")
+        return resultado
     
     @staticmethod
     def analisar_conflitos_jurisdicionais(paises: List[str], situacao: str) -> Dict[str, Any]:
@@ -140,133 +323,38 @@ class ValidadorJuridicoTools(Toolkit):
         if len(paises) < 2:
             return {"conflito": "nao_aplicavel", "paises": paises}
         
-        # Matriz de conflitos conhecidos
-        conflitos_comuns = {
-            ("brasil", "portugal"): {
-                "area": "residencia_fiscal",
-                "risco": "medio",
-                "solucao": "Tratado Brasil-Portugal, tie-breakers aplicáveis"
-            },
-            ("brasil", "uruguai"): {
-                "area": "residencia_fiscal",
-                "risco": "baixo",
-                "solucao": "Tratado vigente, sistema territorial uruguaio facilita"
-            },
-            ("brasil", "paraguai"): {
-                "area": "residencia_fiscal", 
-                "risco": "baixo",
-                "solucao": "Sistema territorial paraguaio, poucos conflitos"
-            },
-            ("brasil", "eua"): {
-                "area": "compliance",
-                "risco": "alto",
-                "solucao": "FATCA obrigatório, tratado aplicável"
-            }
-        }
-        
-        # Normalizar nomes dos países
-        paises_norm = [p.lower() for p in paises]
+        # Normalizar nomes dos países e consultar o índice por par, na ordem da matriz
+        paises_norm = {_norm_country(p) for p in paises}
+        encontrados = sorted(filter(None, (
+            _INDICE_CONFLITOS.get(frozenset(par)) for par in combinations(paises_norm, 2)
+        )))
         
-        conflitos_identificados = []
-        for combinacao, detalhes in conflitos_comuns.items():
-            if all(pais in paises_norm for pais in combinacao):
-                conflitos_identificados.append({
-                    "jurisdicoes": combinacao,
-                    "detalhes": detalhes
-                })
+        conflitos_identificados = [
+            {"jurisdicoes": combinacao, "detalhes": dict(detalhes)}
+            for _, combinacao, detalhes in encontrados
+        ]
         
         return {
             "paises_analisados": paises,
             "conflitos_identificados": conflitos_identificados,
             "nivel_complexidade": "alta" if len(conflitos_identificados) > 1 else "media" if conflitos_identificados else "baixa",
-            "recomendacoes": [
-                "Verificar tratados específicos vigentes",
-                "Analisar tie-breakers aplicáveis",
-                "Considerar procedimento amigável se necessário"
-            ]
+            "recomendacoes": list(_RECOMENDACOES_CONFLITO)
         }
     
     @staticmethod
     def validar_aplicabilidade_tratados(pais_origem: str, pais_destino: str, tipo_renda: str) -> Dict[str, Any]:
         """Valida a aplicabilidade de tratados para evitar dupla tributação"""
         
-        # Base de tratados conhecidos (simplificada)
-        tratados_vigentes = {
-            ("brasil", "portugal"): {"vigente": True, "ano": "2000", "atualizado": "2022"},
-            ("brasil", "uruguai"): {"vigente": True, "ano": "2019", "atualizado": "2019"},
-            ("brasil", "paraguai"): {"vigente": False, "observacao": "Não há tratado específico"},
-            ("brasil", "espanha"): {"vigente": True, "ano": "1974", "atualizado": "revisão pendente"},
-            ("brasil", "alemanha"): {"vigente": True, "ano": "1975", "atualizado": "2021"},
-            ("brasil", "eua"): {"vigente": False, "observacao": "Acordo limitado para transporte"}
-        }
-        
-        chave = (pais_origem.lower(), pais_destino.lower())
-        chave_inversa = (pais_destino.lower(), pais_origem.lower())
-        
-        tratado_info = tratados_vigentes.get(chave) or tratados_vigentes.get(chave_inversa)
-        
-        if not tratado_info:
-            return {
-                "aplicavel": False,
-                "motivo": "Tratado não identificado na base",
-                "alternativas": ["Verificar legislação interna", "Consultar Receita Federal"]
-            }
-        
-        if not tratado_info.get("vigente"):
-            return {
-                "aplicavel": False,
-                "motivo": tratado_info.get("observacao", "Tratado não vigente"),
-                "alternativas": ["Aplicar legislação interna", "Verificar acordos multilaterais"]
-            }
-        
-        return {
-            "aplicavel": True,
-            "tratado": f"Tratado {pais_origem.title()}-{pais_destino.title()}",
-            "ano_assinatura": tratado_info.get("ano"),
-            "ultima_atualizacao": tratado_info.get("atualizado"),
-            "tipo_renda": tipo_renda,
-            "proximos_passos": [
-                "Verificar texto específico do tratado",
-                "Aplicar tie-breakers se necessário",
-                "Considerar procedimento amigável para casos complexos"
-            ]
-        }
+        return _copiar_resultado(_aplicabilidade_tratado(pais_origem, pais_destino, tipo_renda))
     
     @staticmethod
     def verificar_precedentes(jurisdicao: str, conceito: str) -> Dict[str, Any]:
         """Verifica precedentes jurisprudenciais relevantes"""
         
-        # Base simplificada de precedentes importantes
-        precedentes_relevantes = {
-            "brasil": {
-                "residencia_fiscal": [
-                    "CARF: Conceito de centro de interesses vitais",
-                    "STJ: Aplicação do teste dos 183 dias",
-                    "RFB: Posicionamento sobre residência presumida"
-                ],
-                "tratados": [
-                    "CARF: Interpretação de tie-breakers",
-                    "STF: Hierarquia dos tratados tributários"
-                ]
-            },
-            "portugal": {
-                "residencia_fiscal": [
-                    "AT: Critérios de demonstração de vínculos",
-                    "STA: Presunção de residência por cônjuge/filhos"
-                ]
-            }
-        }
-        
-        precedentes = precedentes_relevantes.get(jurisdicao.lower(), {}).get(conceito.lower(), [])
-        
-        return {
-            "jurisdicao": jurisdicao,
-            "conceito": conceito,
-            "precedentes_encontrados": len(precedentes),
-            "precedentes": precedentes,
-            "relevancia": "alta" if precedentes else "consultar_diretamente",
-            "observacao": "Precedentes encontrados na base interna" if precedentes else "Verificar jurisprudência atualizada"
-        }
+        return _copiar_resultado(_precedentes(jurisdicao, conceito))
+
+# Toolkit sem estado, compartilhado por todos os agentes criados
+_VALIDADOR_TOOLS = ValidadorJuridicoTools()
 
 def criar_agente_validador():
     """Cria e configura o Agente Validador Jurídico"""
@@ -274,7 +362,7 @@ def criar_agente_validador():
     return Agent(
         name="Validador Jurídico Tributário",
         model=Claude(id="claude-sonnet-4-20250514"),
-        tools=[ValidadorJuridicoTools()],
+        tools=[_VALIDADOR_TOOLS],
         description="""
         Sou um validador jurídico especializado em Direito Tributário Internacional, responsável por:
         - Validar a consistência legal das informações encontradas
@@ -304,7 +392,7 @@ def criar_agente_validador():
         
         SEMPRE mantenha rigor jurídico e prudência profissional.
         """,
-        show_tool_calls=True,
+        show_tool_calls=SHOW_TOOL_CALLS,
         markdown=True
     )
 
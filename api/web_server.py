@@ -3,21 +3,46 @@ Servidor web FastAPI para integração com frontend Next.js.
 Expõe endpoints REST para consultas tributárias.
 """
 
+import asyncio
+import importlib.util
+import logging
+import logging.config
 import os
 import sys
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 try:
     from fastapi import FastAPI, HTTPException
     from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.responses import JSONResponse
+    from fastapi.responses import JSONResponse, Response
     from pydantic import BaseModel, Field
     FASTAPI_AVAILABLE = True
 except ImportError:
     FASTAPI_AVAILABLE = False
-    print("⚠️ FastAPI não disponível. Execute: pip install fastapi uvicorn")
+    logger.warning("FastAPI não disponível. Execute: pip install fastapi uvicorn")
+
+# Serialização JSON em C (orjson) quando disponível
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    DefaultResponse = JSONResponse if FASTAPI_AVAILABLE else None
+
+# Encoder msgspec (C) para a resposta de /query quando disponível
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    # Sem msgspec, /query usa a classe de resposta padrão (orjson ou json)
+    MSGSPEC_AVAILABLE = False
 
 # Adicionar root do projeto ao path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -28,7 +53,39 @@ try:
     BACKEND_AVAILABLE = True
 except ImportError as e:
     BACKEND_AVAILABLE = False
-    print(f"⚠️ Backend não disponível: {e}")
+    logger.warning("Backend não disponível: %s", e)
+
+
+# Status, países e tópicos mudam raramente: cache com TTL curto para o polling do frontend
+METADATA_CACHE_TTL = 30.0
+_metadata_cache: Dict[str, Tuple[float, Any]] = {}
+
+
+def _cached_metadata(key: str, loader: Callable[[], Any]) -> Any:
+    """Retorna o valor em cache ou o recarrega via loader após o TTL."""
+    now = time.monotonic()
+    entry = _metadata_cache.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    value = loader()
+    _metadata_cache[key] = (now + METADATA_CACHE_TTL, value)
+    return value
+
+
+# Timestamp ISO para monitoramento, recalculado no máximo uma vez por segundo
+_last_iso_ts = float("-inf")
+_last_iso = ""
+
+
+def _iso_now() -> str:
+    """Retorna o timestamp ISO atual com resolução de 1 segundo."""
+    global _last_iso_ts, _last_iso
+    now = time.monotonic()
+    if now - _last_iso_ts >= 1.0:
+        _last_iso = datetime.now().isoformat()
+        _last_iso_ts = now
+    return _last_iso
 
 
 # Modelos da API
@@ -60,6 +117,28 @@ class QueryResponse(BaseModel):
     suggested_countries: List[str] = Field(default_factory=list)
 
 
+if MSGSPEC_AVAILABLE:
+    class SourcePayload(msgspec.Struct, kw_only=True):
+        """Fonte citada na resposta (serialização msgspec)."""
+        document_title: str
+        page_number: Optional[int] = None
+        section: Optional[str] = None
+        confidence: float
+        relevant_text: str
+
+    class QueryPayload(msgspec.Struct):
+        """Resposta da consulta tributária (serialização msgspec)."""
+        answer: str
+        confidence_score: float
+        sources: List[SourcePayload]
+        search_results_count: int
+        processing_time_ms: int
+        related_topics: List[str] = []
+        suggested_countries: List[str] = []
+
+    _query_encoder = msgspec.json.Encoder()
+
+
 class SystemStatus(BaseModel):
     """Status do sistema."""
     status: str
@@ -74,12 +153,50 @@ class SystemStatus(BaseModel):
 
 # Inicializar FastAPI
 if FASTAPI_AVAILABLE:
+    # Base de conhecimento carregada em segundo plano no startup (não no import)
+    knowledge_base = None
+    _kb_task: Optional[asyncio.Task] = None
+
+    # /setup reescreve a coleção: aguarda as consultas em andamento e recusa novas
+    _setup_in_progress = False
+    _active_queries = 0
+    _query_state = asyncio.Condition()
+
+
+    def _init_knowledge_base():
+        """Inicializa a base de conhecimento (bloqueante, executada em thread)."""
+        global knowledge_base
+        try:
+            logger.info("Inicializando base de conhecimento...")
+            knowledge_base = TaxKnowledgeBase()
+            logger.info("Base de conhecimento inicializada")
+        except Exception as e:
+            logger.error("Erro ao inicializar base: %s", e)
+            knowledge_base = None
+
+
+    @asynccontextmanager
+    async def lifespan(app):
+        """Dispara o carregamento da base sem bloquear o startup do worker."""
+        global _kb_task
+        if BACKEND_AVAILABLE:
+            _kb_task = asyncio.create_task(asyncio.to_thread(_init_knowledge_base))
+        yield
+
+
+    def _kb_starting() -> bool:
+        """Indica se a base ainda está sendo carregada."""
+        return _kb_task is not None and not _kb_task.done()
+
+
     app = FastAPI(
         title="IA Tributária Internacional API",
         description="API REST para consultas tributárias internacionais com RAG",
         version="1.0.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        default_response_class=DefaultResponse,
+        lifespan=lifespan
     )
 
     # CORS para Next.js frontend
@@ -96,17 +213,6 @@ if FASTAPI_AVAILABLE:
         allow_headers=["*"],
     )
 
-    # Inicializar base de conhecimento globalmente
-    knowledge_base = None
-    if BACKEND_AVAILABLE:
-        try:
-            print("🚀 Inicializando base de conhecimento...")
-            knowledge_base = TaxKnowledgeBase()
-            print("✅ Base de conhecimento inicializada")
-        except Exception as e:
-            print(f"❌ Erro ao inicializar base: {e}")
-            knowledge_base = None
-
 
     @app.get("/", response_model=dict)
     async def root():
@@ -124,8 +230,8 @@ if FASTAPI_AVAILABLE:
     async def health_check():
         """Health check para monitoring."""
         return {
-            "status": "healthy" if knowledge_base else "degraded",
-            "timestamp": datetime.now().isoformat(),
+            "status": "healthy" if knowledge_base else "starting" if _kb_starting() else "degraded",
+            "timestamp": _iso_now(),
             "backend_available": BACKEND_AVAILABLE,
             "knowledge_base_ready": knowledge_base is not None
         }
@@ -143,11 +249,11 @@ if FASTAPI_AVAILABLE:
                 unique_documents=0,
                 countries_covered=0,
                 topics_covered=0,
-                last_updated=datetime.now().isoformat()
+                last_updated=_iso_now()
             )
 
         try:
-            system_stats = knowledge_base.get_system_status()
+            system_stats = _cached_metadata("status", knowledge_base.get_system_status)
             vs_stats = system_stats.get("vector_store", {})
             doc_stats = system_stats.get("documents", {})
 
@@ -159,7 +265,7 @@ if FASTAPI_AVAILABLE:
                 unique_documents=vs_stats.get("unique_documents", 0),
                 countries_covered=doc_stats.get("countries_covered", 0),
                 topics_covered=doc_stats.get("topics_covered", 0),
-                last_updated=system_stats.get("last_updated", datetime.now().isoformat())
+                last_updated=system_stats.get("last_updated", _iso_now())
             )
 
         except Exception as e:
@@ -169,51 +275,72 @@ if FASTAPI_AVAILABLE:
     @app.post("/query", response_model=QueryResponse)
     async def process_query(request: QueryRequest):
         """Processar consulta tributária."""
+        global _active_queries
+
         if not knowledge_base:
             raise HTTPException(
                 status_code=503, 
                 detail="Base de conhecimento não disponível. Verifique se o sistema foi configurado."
             )
 
+        async with _query_state:
+            if _setup_in_progress:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Configuração da base em andamento. Tente novamente em instantes."
+                )
+            _active_queries += 1
+
         try:
-            start_time = datetime.now()
+            start_ns = time.perf_counter_ns()
 
-            # Processar consulta
-            response = knowledge_base.query(
+            # Processar consulta fora do event loop (busca vetorial e LLM são bloqueantes)
+            response = await asyncio.to_thread(
+                knowledge_base.query,
                 question=request.question,
                 countries=request.countries,
                 max_results=request.max_results,
                 min_confidence=request.min_confidence
             )
 
-            processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
-
-            # Converter fontes
-            sources = []
-            for source in response.sources:
-                sources.append(SourceResponse(
-                    document_title=source.document_title,
-                    page_number=source.page_number,
-                    section=source.section,
-                    confidence=source.confidence,
-                    relevant_text=source.relevant_text
-                ))
+            processing_time = (time.perf_counter_ns() - start_ns) // 1_000_000
 
-            return QueryResponse(
+            fields = dict(
                 answer=response.answer,
                 confidence_score=response.confidence_score,
-                sources=sources,
                 search_results_count=response.search_results_count,
                 processing_time_ms=processing_time,
                 related_topics=response.related_topics,
                 suggested_countries=response.suggested_countries
             )
+            source_fields = [
+                dict(
+                    document_title=source.document_title,
+                    page_number=source.page_number,
+                    section=source.section,
+                    confidence=source.confidence,
+                    relevant_text=source.relevant_text
+                )
+                for source in response.sources
+            ]
+
+            if MSGSPEC_AVAILABLE:
+                # Dados já validados no backend: codificados direto em JSON pelo msgspec
+                payload = QueryPayload(sources=[SourcePayload(**f) for f in source_fields], **fields)
+                return Response(content=_query_encoder.encode(payload), media_type="application/json")
+
+            # Sem msgspec: serializado pela classe de resposta padrão (ORJSONResponse ou JSONResponse)
+            return QueryResponse(sources=[SourceResponse(**f) for f in source_fields], **fields)
 
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Erro ao processar consulta: {str(e)}"
             )
+        finally:
+            async with _query_state:
+                _active_queries -= 1
+                _query_state.notify_all()
 
 
     @app.get("/countries", response_model=List[str])
@@ -223,7 +350,7 @@ if FASTAPI_AVAILABLE:
             raise HTTPException(status_code=503, detail="Base de conhecimento não disponível")
 
         try:
-            countries = knowledge_base.list_countries()
+            countries = _cached_metadata("countries", knowledge_base.list_countries)
             return countries
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Erro ao listar países: {str(e)}")
@@ -236,7 +363,7 @@ if FASTAPI_AVAILABLE:
             raise HTTPException(status_code=503, detail="Base de conhecimento não disponível")
 
         try:
-            topics = knowledge_base.list_topics()
+            topics = _cached_metadata("topics", knowledge_base.list_topics)
             return topics
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Erro ao listar tópicos: {str(e)}")
@@ -245,16 +372,30 @@ if FASTAPI_AVAILABLE:
     @app.post("/setup", response_model=dict)
     async def setup_system():
         """Configura o sistema processando documentos."""
-        global knowledge_base
+        global knowledge_base, _setup_in_progress
 
         if not BACKEND_AVAILABLE:
             raise HTTPException(status_code=503, detail="Backend não disponível")
 
+        async with _query_state:
+            if _setup_in_progress:
+                raise HTTPException(status_code=409, detail="Configuração já em andamento")
+            _setup_in_progress = True
+
         try:
+            # Novas consultas são recusadas; as em andamento terminam antes da reescrita
+            async with _query_state:
+                await _query_state.wait_for(lambda: _active_queries == 0)
+
+            # Aguardar o carregamento iniciado no startup antes de criar outra instância
+            if _kb_task is not None:
+                await _kb_task
             if not knowledge_base:
-                knowledge_base = TaxKnowledgeBase()
+                knowledge_base = await asyncio.to_thread(TaxKnowledgeBase)
 
-            setup_report = knowledge_base.setup(process_documents=True)
+            # Processamento bloqueante fora do event loop
+            setup_report = await asyncio.to_thread(knowledge_base.setup, process_documents=True)
+            _metadata_cache.clear()
 
             return {
                 "message": "Sistema configurado com sucesso" if setup_report.get("ready_for_queries") else "Sistema configurado com limitações",
@@ -263,6 +404,9 @@ if FASTAPI_AVAILABLE:
 
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Erro na configuração: {str(e)}")
+        finally:
+            async with _query_state:
+                _setup_in_progress = False
 
 
 def create_app():
@@ -273,28 +417,53 @@ def create_app():
     return app
 
 
+def _fastest_available(module: str, fallback: str) -> str:
+    """Retorna o módulo se estiver instalado, senão a implementação padrão."""
+    return module if importlib.util.find_spec(module) else fallback
+
+
 def run_server(host: str = "0.0.0.0", port: int = 8000, reload: bool = True):
-    """Executa o servidor web."""
+    """
+    Executa o servidor web.
+
+    Usa uvloop e httptools (implementações em C do event loop e do parser HTTP)
+    quando instalados. Roda em um único processo: caches de consultas, status e
+    o registro de documentos vivem em memória, e um /setup em um worker deixaria
+    os demais servindo dados antigos.
+    """
     if not FASTAPI_AVAILABLE:
-        print("❌ FastAPI não disponível. Execute: pip install fastapi uvicorn")
+        logger.error("FastAPI não disponível. Execute: pip install fastapi uvicorn")
         return
 
     try:
         import uvicorn
-        print(f"🚀 Iniciando servidor web em http://{host}:{port}")
-        print(f"📖 Documentação: http://{host}:{port}/docs")
+        from uvicorn.config import LOGGING_CONFIG
+
+        # Logs da API e do core passam pelos mesmos handlers do uvicorn
+        log_config = {**LOGGING_CONFIG, "loggers": {
+            **LOGGING_CONFIG["loggers"],
+            "api": {"handlers": ["default"], "level": "INFO", "propagate": False},
+            "core": {"handlers": ["default"], "level": "INFO", "propagate": False}
+        }}
+        logging.config.dictConfig(log_config)
+
+        logger.info("Iniciando servidor web em http://%s:%s", host, port)
+        logger.info("Documentação: http://%s:%s/docs", host, port)
         
         uvicorn.run(
             "api.web_server:app",
             host=host,
             port=port,
             reload=reload,
+            loop=_fastest_available("uvloop", "asyncio"),
+            http=_fastest_available("httptools", "h11"),
+            log_config=log_config,
             log_level="info"
         )
     except ImportError:
-        print("❌ Uvicorn não disponível. Execute: pip install uvicorn")
+        logger.error("Uvicorn não disponível. Execute: pip install uvicorn")
     except Exception as e:
-        print(f"❌ Erro ao iniciar servidor: {e}")
+        logger.error("Erro ao iniciar servidor: %s", e)
 
 
 if __name__ == "__main__":
@@ -4,11 +4,17 @@ Orquestração e componentes centrais.
 """
 
 from .vector_store import TaxVectorStore
+from .embedding_cache import EmbeddingCache
+from .query_cache import QueryCache
+from .search_cache import SearchCache
 from .document_manager import DocumentManager
 from .knowledge_base import TaxKnowledgeBase
 
 __all__ = [
     "TaxVectorStore",
+    "EmbeddingCache",
+    "QueryCache",
+    "SearchCache",
     "DocumentManager", 
     "TaxKnowledgeBase"
 ]
\ No newline at end of file
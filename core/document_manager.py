@@ -3,17 +3,119 @@ Gerenciador de documentos para o sistema tributário.
 Processa PDFs e Markdowns, gera chunks e alimenta vector store.
 """
 
+import atexit
 import json
+import logging
+import multiprocessing
+import os
+import time
+import weakref
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import chain
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    # orjson é opcional: sem ele o registro usa o json da biblioteca padrão
+    ORJSON_AVAILABLE = False
+
 from ..models.document import Document
-from ..models.chunk import Chunk
+from ..models.chunk import ChunkCore
 from ..tools.pdf_processor import PDFProcessor
 from ..tools.markdown_processor import MarkdownProcessor
 from ..tools.chunking_tools import ChunkingTools
 from .vector_store import TaxVectorStore
+from .embedding_cache import EmbeddingCache
+
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps_record(record: Dict[str, Any]) -> bytes:
+    """Serializa uma operação do registro como linha JSONL (UTF-8)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """Desserializa JSON (orjson quando disponível)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Extensões de arquivo processadas pelo gerenciador
+SUPPORTED_EXTENSIONS = frozenset({".pdf", ".md"})
+
+# Processadores por processo (criados sob demanda em cada worker do pool)
+_WORKER_PROCESSORS: Optional[Tuple[PDFProcessor, MarkdownProcessor, ChunkingTools]] = None
+
+
+def _get_worker_processors() -> Tuple[PDFProcessor, MarkdownProcessor, ChunkingTools]:
+    """Retorna os processadores do processo atual, criando-os uma única vez."""
+    global _WORKER_PROCESSORS
+    if _WORKER_PROCESSORS is None:
+        _WORKER_PROCESSORS = (PDFProcessor(), MarkdownProcessor(), ChunkingTools())
+    return _WORKER_PROCESSORS
+
+
+def _parse_and_chunk(file_path: Path,
+                     pdf_processor: PDFProcessor,
+                     markdown_processor: MarkdownProcessor,
+                     chunking_tools: ChunkingTools) -> Tuple[Document, List[ChunkCore]]:
+    """
+    Etapa CPU-bound: extrai o documento e gera os chunks finais.
+    
+    Raises:
+        ValueError: Tipo de arquivo não suportado
+    """
+    suffix = file_path.suffix.lower()
+    if suffix == '.pdf':
+        document = pdf_processor.process_pdf(file_path)
+    elif suffix == '.md':
+        document = markdown_processor.process_markdown(file_path)
+    else:
+        raise ValueError(f"Tipo de arquivo não suportado: {file_path.suffix}")
+    
+    # Gerar e otimizar chunks
+    chunks = chunking_tools.create_chunks(document)
+    optimized_chunks = chunking_tools.optimize_chunks(chunks)
+    merged_chunks = chunking_tools.merge_small_chunks(optimized_chunks)
+    
+    # Daqui em diante os chunks só são lidos: a forma enxuta reduz a memória
+    # dos lotes pendentes e o pickle na volta dos processos de parse
+    return document, [ChunkCore.from_chunk(chunk) for chunk in merged_chunks]
+
+
+def _process_file_worker(file_path: Path) -> Tuple[Document, List[ChunkCore], float]:
+    """
+    Worker do pool de processos: parse + chunking de um arquivo.
+    
+    Não acessa vector store nem registro (não são seguros entre processos);
+    a indexação é feita no processo principal.
+    """
+    start_time = time.monotonic()
+    document, merged_chunks = _parse_and_chunk(file_path, *_get_worker_processors())
+    return document, merged_chunks, time.monotonic() - start_time
+
+
+# Gerenciadores vivos, sem mantê-los em memória: o log de cada um é compactado ao encerrar
+_LIVE_MANAGERS: "weakref.WeakSet[DocumentManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_live_managers():
+    """Fecha os gerenciadores ainda vivos ao encerrar o processo."""
+    for manager in list(_LIVE_MANAGERS):
+        manager.close()
 
 
 class DocumentManager:
@@ -21,16 +123,24 @@ class DocumentManager:
     
     def __init__(self, 
                  data_path: str = "./data",
-                 vector_store: Optional[TaxVectorStore] = None):
+                 vector_store: Optional[TaxVectorStore] = None,
+                 max_workers: Optional[int] = None,
+                 add_chunks_batch_size: int = 512):
         """
         Inicializa o gerenciador de documentos.
         
         Args:
             data_path: Caminho para dados
             vector_store: Store vetorial (opcional)
+            max_workers: Processos para parse/chunking (padrão: núcleos - 1)
+            add_chunks_batch_size: Chunks acumulados antes de cada envio ao vector store
         """
         self.data_path = Path(data_path)
-        self.processed_docs_file = self.data_path / "processed_documents.json"
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.add_chunks_batch_size = add_chunks_batch_size
+        self.processed_docs_file = self.data_path / "processed_documents.jsonl"
+        self.legacy_processed_docs_file = self.data_path / "processed_documents.json"
+        self.embedding_cache_file = self.data_path / "embedding_cache.sqlite"
         
         # Inicializar processadores
         self.pdf_processor = PDFProcessor()
@@ -38,10 +148,26 @@ class DocumentManager:
         self.chunking_tools = ChunkingTools()
         
         # Vector store
-        self.vector_store = vector_store or TaxVectorStore()
-        
-        # Carregar registro de documentos processados
+        self.vector_store = vector_store or TaxVectorStore(
+            embedding_cache=EmbeddingCache(str(self.embedding_cache_file))
+        )
+        
+        # Carregar registro de documentos processados (log JSONL append-only)
+        self._registry_log = None
+        self._registry_records = 0
+        self._registry_needs_compaction = False
         self.processed_docs = self._load_processed_docs()
+        if self._registry_needs_compaction:
+            self._compact_registry()
+        
+        # Compactar o log ao encerrar o processo (handler único do módulo)
+        _LIVE_MANAGERS.add(self)
+        
+        # Agregados do registro mantidos incrementalmente
+        self._rebuild_aggregates()
+        
+        # Listagem da pasta de dados, válida enquanto o mtime não mudar
+        self._files_cache: Optional[Tuple[int, List[Path], Dict[str, Path]]] = None
     
     def process_all_documents(self) -> Dict[str, Any]:
         """
@@ -60,48 +186,45 @@ class DocumentManager:
             "processed_files": []
         }
         
-        print("🚀 Iniciando processamento de documentos...")
+        logger.info("🚀 Iniciando processamento de documentos...")
         
         # Encontrar arquivos para processar
-        pdf_files = list(self.data_path.glob("*.pdf"))
-        md_files = list(self.data_path.glob("*.md"))
-        
-        all_files = pdf_files + md_files
+        all_files = self._list_files()
         report["documents_found"] = len(all_files)
         
         if not all_files:
-            print("⚠️ Nenhum documento encontrado para processar")
+            logger.warning("⚠️ Nenhum documento encontrado para processar")
             return report
         
-        # Processar cada arquivo
-        for file_path in all_files:
-            try:
-                result = self.process_single_document(file_path)
-                
-                if result["success"]:
-                    report["documents_processed"] += 1
-                    report["total_chunks"] += result["chunks_count"]
-                    report["processed_files"].append({
-                        "file": str(file_path),
-                        "type": result["document_type"],
-                        "chunks": result["chunks_count"],
-                        "processing_time": result["processing_time"]
-                    })
-                    print(f"✅ {file_path.name}: {result['chunks_count']} chunks")\n                else:
-                    report["documents_skipped"] += 1
-                    if result.get("error"):
-                        report["errors"].append({
-                            "file": str(file_path),
-                            "error": result["error"]
-                        })
-                    print(f"⏭️ {file_path.name}: {result.get('reason', 'Pulado')}")
-                    
-            except Exception as e:
-                report["errors"].append({
-                    "file": str(file_path),
-                    "error": str(e)
-                })
-                print(f"❌ Erro processando {file_path.name}: {str(e)}")
+        # Arquivos já registrados são contabilizados em bloco, sem passar pelo pool
+        processed_docs = self.processed_docs
+        pending_files = [p for p in all_files if p.name not in processed_docs]
+        skipped_count = len(all_files) - len(pending_files)
+        report["documents_skipped"] += skipped_count
+        if skipped_count:
+            logger.info("⏭️ %s documento(s) já processado(s) anteriormente", skipped_count)
+        
+        # Chunks acumulados entre arquivos e enviados ao vector store em lotes
+        pending_chunks: List[ChunkCore] = []
+        pending_docs: List[Tuple[Path, Document, List[ChunkCore], float]] = []
+        
+        for file_path, parsed in self._parse_files(pending_files):
+            if isinstance(parsed, Exception):
+                self._record_result(report, file_path, {"success": False, "error": str(parsed)})
+                continue
+            
+            document, merged_chunks, parse_seconds = parsed
+            if not merged_chunks:
+                self._record_result(report, file_path, self._register_without_chunks(file_path, document))
+                continue
+            
+            pending_docs.append((file_path, document, merged_chunks, parse_seconds))
+            pending_chunks.extend(merged_chunks)
+            
+            if len(pending_chunks) >= self.add_chunks_batch_size:
+                self._flush_pending(report, pending_docs, pending_chunks)
+        
+        self._flush_pending(report, pending_docs, pending_chunks)
         
         # Salvar registro atualizado
         self._save_processed_docs()
@@ -123,7 +246,7 @@ class DocumentManager:
         Returns:
             Dict: Resultado do processamento
         """
-        start_time = datetime.now()
+        start_time = time.monotonic()
         
         # Verificar se já foi processado
         file_key = str(file_path.name)
@@ -135,65 +258,174 @@ class DocumentManager:
             }
         
         try:
-            # Detectar tipo e processar
-            if file_path.suffix.lower() == '.pdf':
-                document = self.pdf_processor.process_pdf(file_path)
-            elif file_path.suffix.lower() == '.md':
-                document = self.markdown_processor.process_markdown(file_path)
-            else:
-                return {
-                    "success": False,
-                    "error": f"Tipo de arquivo não suportado: {file_path.suffix}"
-                }
-            
-            # Gerar chunks
-            chunks = self.chunking_tools.create_chunks(document)
-            
-            # Otimizar chunks
-            optimized_chunks = self.chunking_tools.optimize_chunks(chunks)
-            merged_chunks = self.chunking_tools.merge_small_chunks(optimized_chunks)
-            
-            # Adicionar ao vector store
-            success = self.vector_store.add_chunks(merged_chunks)
-            
-            if success:
-                # Registrar como processado
-                self.processed_docs[file_key] = {
-                    "document_id": document.id,
-                    "file_path": str(file_path),
-                    "document_type": document.metadata.document_type.value,
-                    "source_type": document.metadata.source_type.value,
-                    "chunks_count": len(merged_chunks),
-                    "processed_at": datetime.now().isoformat(),
-                    "file_size_mb": document.metadata.file_size_mb,
-                    "countries": document.metadata.countries,
-                    "topics": document.metadata.topics
-                }
-                
-                # Atualizar documento com info dos chunks
-                document.chunks_count = len(merged_chunks)
-                document.embedded = True
-                
-                processing_time = (datetime.now() - start_time).total_seconds()
-                
-                return {
-                    "success": True,
-                    "document_id": document.id,
-                    "document_type": document.metadata.document_type.value,
-                    "chunks_count": len(merged_chunks),
-                    "processing_time": f"{processing_time:.2f}s"
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": "Falha ao adicionar chunks ao vector store"
-                }
-                
+            document, merged_chunks = _parse_and_chunk(
+                file_path, self.pdf_processor, self.markdown_processor, self.chunking_tools
+            )
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
+        
+        if not merged_chunks:
+            return self._register_without_chunks(file_path, document)
+        
+        parse_seconds = time.monotonic() - start_time
+        batch = [(file_path, document, merged_chunks, parse_seconds)]
+        return self._index_batch(batch, merged_chunks)[0][1]
+    
+    def _parse_files(self, file_paths: List[Path]):
+        """
+        Executa parse + chunking dos arquivos, em paralelo quando possível.
+        
+        Yields:
+            Tuple: (arquivo, (documento, chunks, segundos) ou a exceção levantada)
+        """
+        workers = min(self.max_workers, len(file_paths))
+        if workers <= 1:
+            # Sem ganho em paralelizar: processar sequencialmente
+            for file_path in file_paths:
+                start_time = time.monotonic()
+                try:
+                    document, merged_chunks = _parse_and_chunk(
+                        file_path, self.pdf_processor, self.markdown_processor, self.chunking_tools
+                    )
+                except Exception as e:
+                    yield file_path, e
+                    continue
+                yield file_path, (document, merged_chunks, time.monotonic() - start_time)
+            return
+        
+        # Parse + chunking em paralelo; indexação e registro no processo principal.
+        # "spawn": o processo principal pode ter threads ativas (servidor web),
+        # e um fork com locks ocupados pode travar o worker
+        pool_context = multiprocessing.get_context("spawn")
+        
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context) as executor:
+            futures = {
+                executor.submit(_process_file_worker, file_path): file_path
+                for file_path in file_paths
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+    
+    def _flush_pending(self,
+                       report: Dict[str, Any],
+                       pending_docs: List[Tuple[Path, Document, List[ChunkCore], float]],
+                       pending_chunks: List[ChunkCore]):
+        """Envia o lote acumulado ao vector store e contabiliza cada arquivo."""
+        if not pending_docs:
+            return
+        
+        for file_path, result in self._index_batch(pending_docs, pending_chunks):
+            self._record_result(report, file_path, result)
+        
+        pending_docs.clear()
+        pending_chunks.clear()
+    
+    def _index_batch(self,
+                     batch: List[Tuple[Path, Document, List[ChunkCore], float]],
+                     chunks: List[ChunkCore]) -> List[Tuple[Path, Dict[str, Any]]]:
+        """
+        Adiciona os chunks de vários documentos com uma única chamada ao
+        vector store e, em caso de sucesso, registra todos os documentos.
+        
+        Executa sempre no processo principal.
+        """
+        start_time = time.monotonic()
+        
+        try:
+            success = self.vector_store.add_chunks(chunks)
+        except Exception as e:
+            return [(file_path, {"success": False, "error": str(e)}) for file_path, *_ in batch]
+        
+        if not success:
+            return [
+                (file_path, {"success": False, "error": "Falha ao adicionar chunks ao vector store"})
+                for file_path, *_ in batch
+            ]
+        
+        flush_seconds = time.monotonic() - start_time
+        processed_at = datetime.now().isoformat()
+        results = []
+        
+        for file_path, document, merged_chunks, parse_seconds in batch:
+            chunks_count = len(merged_chunks)
+            
+            # Registrar como processado
+            doc_info = self._registry_entry(file_path, document, chunks_count, processed_at)
+            self._register(file_path.name, doc_info)
+            document_type = doc_info["document_type"]
+            
+            # Atualizar documento com info dos chunks
+            document.chunks_count = chunks_count
+            document.embedded = True
+            
+            processing_time = parse_seconds + flush_seconds
+            
+            results.append((file_path, {
+                "success": True,
+                "document_id": document.id,
+                "document_type": document_type,
+                "chunks_count": chunks_count,
+                "processing_time": f"{processing_time:.2f}s"
+            }))
+        
+        return results
+    
+    def _registry_entry(self,
+                        file_path: Path,
+                        document: Document,
+                        chunks_count: int,
+                        processed_at: Optional[str] = None) -> Dict[str, Any]:
+        """Monta a entrada do registro de um documento processado."""
+        metadata = document.metadata
+        return {
+            "document_id": document.id,
+            "file_path": str(file_path),
+            "document_type": metadata.document_type.value,
+            "source_type": metadata.source_type.value,
+            "chunks_count": chunks_count,
+            "processed_at": processed_at or datetime.now().isoformat(),
+            "file_size_mb": metadata.file_size_mb,
+            "countries": metadata.countries,
+            "topics": metadata.topics
+        }
+    
+    def _register_without_chunks(self, file_path: Path, document: Document) -> Dict[str, Any]:
+        """
+        Registra documento sem texto extraível (chunks_count=0) sem acionar o
+        vector store, para que não seja reprocessado a cada execução.
+        """
+        self._register(file_path.name, self._registry_entry(file_path, document, 0))
+        return {
+            "success": False,
+            "reason": "Nenhum texto extraível (PDF apenas digitalizado?)"
+        }
+    
+    def _record_result(self, report: Dict[str, Any], file_path: Path, result: Dict[str, Any]):
+        """Contabiliza o resultado de um arquivo no relatório."""
+        if result["success"]:
+            report["documents_processed"] += 1
+            report["total_chunks"] += result["chunks_count"]
+            report["processed_files"].append({
+                "file": str(file_path),
+                "type": result["document_type"],
+                "chunks": result["chunks_count"],
+                "processing_time": result["processing_time"]
+            })
+            logger.info("✅ %s: %s chunks", file_path.name, result["chunks_count"])
+        else:
+            report["documents_skipped"] += 1
+            if result.get("error"):
+                report["errors"].append({
+                    "file": str(file_path),
+                    "error": result["error"]
+                })
+            logger.info("⏭️ %s: %s", file_path.name, result.get("reason", "Pulado"))
     
     def reprocess_document(self, file_path: Path) -> Dict[str, Any]:
         """
@@ -211,8 +443,8 @@ class DocumentManager:
         if file_key in self.processed_docs:
             document_id = self.processed_docs[file_key]["document_id"]
             self.vector_store.delete_document(document_id)
-            del self.processed_docs[file_key]
-            print(f"🗑️ Documento {file_key} removido para reprocessamento")
+            self._unregister(file_key)
+            logger.info("🗑️ Documento %s removido para reprocessamento", file_key)
         
         # Processar novamente
         return self.process_single_document(file_path)
@@ -221,129 +453,324 @@ class DocumentManager:
         """Retorna status do processamento de documentos."""
         
         # Contar arquivos disponíveis
-        pdf_files = list(self.data_path.glob("*.pdf"))
-        md_files = list(self.data_path.glob("*.md"))
-        total_available = len(pdf_files) + len(md_files)
+        total_available = len(self._list_files())
         
-        # Estatísticas dos processados
+        # Estatísticas dos processados (agregados incrementais)
         processed_count = len(self.processed_docs)
-        total_chunks = sum(doc.get("chunks_count", 0) for doc in self.processed_docs.values())
-        
-        # Agrupar por tipo
-        by_type = {}
-        for doc_info in self.processed_docs.values():
-            doc_type = doc_info.get("document_type", "unknown")
-            if doc_type not in by_type:
-                by_type[doc_type] = {"count": 0, "chunks": 0}
-            by_type[doc_type]["count"] += 1
-            by_type[doc_type]["chunks"] += doc_info.get("chunks_count", 0)
-        
-        # Países cobertos
-        all_countries = set()
-        for doc_info in self.processed_docs.values():
-            all_countries.update(doc_info.get("countries", []))
-        
-        # Tópicos cobertos
-        all_topics = set()
-        for doc_info in self.processed_docs.values():
-            all_topics.update(doc_info.get("topics", []))
+        agg = self._agg
         
         return {
             "files_available": total_available,
             "files_processed": processed_count,
             "files_pending": total_available - processed_count,
-            "total_chunks": total_chunks,
-            "by_document_type": by_type,
-            "countries_covered": len(all_countries),
-            "topics_covered": len(all_topics),
-            "countries_list": sorted(list(all_countries)),
-            "topics_list": sorted(list(all_topics)),
+            "total_chunks": agg["total_chunks"],
+            "by_document_type": {doc_type: dict(stats) for doc_type, stats in agg["by_type"].items()},
+            "countries_covered": len(agg["countries"]),
+            "topics_covered": len(agg["topics"]),
+            "countries_list": list(self._sorted_facet("countries")),
+            "topics_list": list(self._sorted_facet("topics")),
             "vector_store_stats": self.vector_store.get_collection_stats()
         }
     
+    def _list_files(self) -> List[Path]:
+        """
+        Lista os PDFs e Markdowns da pasta de dados.
+        
+        Reaproveita o resultado enquanto o mtime do diretório não mudar.
+        """
+        return list(self._cached_listing()[0])
+    
+    def _files_by_name(self) -> Dict[str, Path]:
+        """Arquivos da pasta de dados indexados pelo nome."""
+        return self._cached_listing()[1]
+    
+    def _cached_listing(self) -> Tuple[List[Path], Dict[str, Path]]:
+        """Listagem da pasta (lista + índice por nome), válida enquanto o mtime não mudar."""
+        try:
+            mtime = self.data_path.stat().st_mtime_ns
+        except OSError:
+            return [], {}
+        
+        if self._files_cache is None or self._files_cache[0] != mtime:
+            files = self._scan_data()
+            self._files_cache = (mtime, files, {file_path.name: file_path for file_path in files})
+        
+        return self._files_cache[1], self._files_cache[2]
+    
+    def _scan_data(self) -> List[Path]:
+        """Varre a pasta de dados com um único os.scandir."""
+        files = []
+        
+        with os.scandir(self.data_path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+                if not entry.is_file():
+                    continue
+                files.append(Path(entry.path))
+        
+        return files
+    
+    def clear_registry(self):
+        """Esvazia o registro de documentos processados e o persiste."""
+        self.processed_docs = {}
+        self._rebuild_aggregates()
+        self._compact_registry()
+    
+    def close(self):
+        """Compacta o log do registro e libera o arquivo (chamadas repetidas não têm efeito)."""
+        _LIVE_MANAGERS.discard(self)
+        if self._registry_log is not None or self._registry_records > len(self.processed_docs):
+            self._compact_registry()
+        if self._registry_log is not None:
+            self._registry_log.close()
+            self._registry_log = None
+    
+    def _register(self, file_key: str, doc_info: Dict[str, Any]):
+        """Registra um documento processado atualizando os agregados."""
+        old_info = self.processed_docs.pop(file_key, None)
+        if old_info is not None:
+            self._update_aggregates(old_info, -1)
+        self.processed_docs[file_key] = doc_info
+        self._update_aggregates(doc_info, 1)
+        self._append_registry({"op": "put", "key": file_key, "val": doc_info})
+    
+    def _unregister(self, file_key: str):
+        """Remove um documento do registro atualizando os agregados."""
+        doc_info = self.processed_docs.pop(file_key, None)
+        if doc_info is not None:
+            self._update_aggregates(doc_info, -1)
+            self._append_registry({"op": "del", "key": file_key})
+    
+    def _rebuild_aggregates(self):
+        """Recalcula os agregados do registro a partir de colunas (SoA)."""
+        docs = list(self.processed_docs.values())
+        
+        # Colunas numéricas: uma redução NumPy em vez de somas dict a dict
+        chunks = np.fromiter((doc_info.get("chunks_count", 0) for doc_info in docs),
+                             dtype=np.int64, count=len(docs))
+        types = [doc_info.get("document_type", "unknown") for doc_info in docs]
+        type_index = {doc_type: code for code, doc_type in enumerate(dict.fromkeys(types))}
+        type_codes = np.fromiter((type_index[doc_type] for doc_type in types),
+                                 dtype=np.int64, count=len(types))
+        type_counts = np.bincount(type_codes, minlength=len(type_index))
+        type_chunks = np.bincount(type_codes, weights=chunks, minlength=len(type_index))
+        
+        by_type = defaultdict(lambda: {"count": 0, "chunks": 0})
+        for doc_type, code in type_index.items():
+            by_type[doc_type] = {"count": int(type_counts[code]), "chunks": int(type_chunks[code])}
+        
+        self._agg = {
+            "total_chunks": int(chunks.sum()),
+            "by_type": by_type,
+            "countries": Counter(chain.from_iterable(doc_info.get("countries", []) for doc_info in docs)),
+            "topics": Counter(chain.from_iterable(doc_info.get("topics", []) for doc_info in docs)),
+            # Listas ordenadas já prontas; refeitas só quando o conjunto muda
+            "sorted": {}
+        }
+    
+    def _update_aggregates(self, doc_info: Dict[str, Any], sign: int):
+        """Soma (sign=1) ou subtrai (sign=-1) um documento dos agregados."""
+        agg = self._agg
+        chunks = doc_info.get("chunks_count", 0)
+        agg["total_chunks"] += sign * chunks
+        
+        doc_type = doc_info.get("document_type", "unknown")
+        stats = agg["by_type"][doc_type]
+        stats["count"] += sign
+        stats["chunks"] += sign * chunks
+        if stats["count"] <= 0:
+            del agg["by_type"][doc_type]
+        
+        for key, values in (("countries", doc_info.get("countries", [])),
+                            ("topics", doc_info.get("topics", []))):
+            counter = agg[key]
+            for value in values:
+                if value not in counter:
+                    agg["sorted"].pop(key, None)
+                counter[value] += sign
+                if counter[value] <= 0:
+                    del counter[value]
+                    agg["sorted"].pop(key, None)
+    
+    def _sorted_facet(self, key: str) -> Tuple[str, ...]:
+        """Valores distintos de países/tópicos em ordem, memorizados entre chamadas."""
+        facet = self._agg["sorted"].get(key)
+        if facet is None:
+            facet = self._agg["sorted"][key] = tuple(sorted(self._agg[key]))
+        return facet
+    
     def _load_processed_docs(self) -> Dict[str, Any]:
-        """Carrega registro de documentos processados."""
+        """Carrega registro de documentos processados aplicando o log JSONL."""
+        processed_docs = {}
+        
         if self.processed_docs_file.exists():
             try:
-                with open(self.processed_docs_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.processed_docs_file, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = _loads(line)
+                        except ValueError:
+                            # Linha truncada (ex.: processo interrompido no meio da escrita)
+                            logger.warning("⚠️ Registro de documentos com linha inválida ignorada")
+                            self._registry_needs_compaction = True
+                            continue
+                        
+                        if record.get("op") == "del":
+                            processed_docs.pop(record["key"], None)
+                        else:
+                            processed_docs[record["key"]] = record["val"]
+                        self._registry_records += 1
+            except Exception as e:
+                logger.warning("⚠️ Erro ao carregar registro de documentos: %s", e)
+        elif self.legacy_processed_docs_file.exists():
+            try:
+                with open(self.legacy_processed_docs_file, 'rb') as f:
+                    processed_docs = _loads(f.read())
+                # Migrar registro legado em JSON para o log
+                self._registry_needs_compaction = True
             except Exception as e:
-                print(f"⚠️ Erro ao carregar registro de documentos: {e}")
-        return {}
+                logger.warning("⚠️ Erro ao carregar registro de documentos: %s", e)
+        
+        return processed_docs
     
-    def _save_processed_docs(self):
-        """Salva registro de documentos processados."""
+    def _append_registry(self, record: Dict[str, Any]):
+        """Acrescenta uma operação ao log do registro (compactando se necessário)."""
         try:
-            with open(self.processed_docs_file, 'w', encoding='utf-8') as f:
-                json.dump(self.processed_docs, f, ensure_ascii=False, indent=2)
+            if self._registry_log is None:
+                self.data_path.mkdir(parents=True, exist_ok=True)
+                self._registry_log = open(self.processed_docs_file, 'ab')
+                _LIVE_MANAGERS.add(self)
+            self._registry_log.write(_dumps_record(record))
+            self._registry_log.flush()
+            self._registry_records += 1
         except Exception as e:
-            print(f"⚠️ Erro ao salvar registro de documentos: {e}")
+            logger.warning("⚠️ Erro ao salvar registro de documentos: %s", e)
+            return
+        
+        # Log com mais que o dobro de operações do que entradas: reescrever
+        if self._registry_records > 2 * len(self.processed_docs):
+            self._compact_registry()
+    
+    def _compact_registry(self):
+        """Reescreve o log com uma operação por documento registrado."""
+        if self._registry_log is not None:
+            self._registry_log.close()
+            self._registry_log = None
+        
+        try:
+            # Escrever em arquivo temporário e trocar atomicamente: leitores
+            # concorrentes nunca veem o registro pela metade
+            tmp_file = self.processed_docs_file.with_suffix(".jsonl.tmp")
+            with open(tmp_file, 'wb') as f:
+                f.write(b"".join(
+                    _dumps_record({"op": "put", "key": file_key, "val": doc_info})
+                    for file_key, doc_info in self.processed_docs.items()
+                ))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.processed_docs_file)
+            self._registry_records = len(self.processed_docs)
+        except Exception as e:
+            logger.warning("⚠️ Erro ao salvar registro de documentos: %s", e)
+    
+    def _save_processed_docs(self):
+        """Garante que o log do registro esteja gravado em disco."""
+        if self._registry_log is not None:
+            try:
+                self._registry_log.flush()
+            except Exception as e:
+                logger.warning("⚠️ Erro ao salvar registro de documentos: %s", e)
     
     def _print_processing_report(self, report: Dict[str, Any]):
-        """Exibe relatório de processamento formatado."""
-        print("\n" + "="*60)
-        print("📊 RELATÓRIO DE PROCESSAMENTO")
-        print("="*60)
-        print(f"📁 Documentos encontrados: {report['documents_found']}")
-        print(f"✅ Documentos processados: {report['documents_processed']}")
-        print(f"⏭️ Documentos pulados: {report['documents_skipped']}")
-        print(f"🧩 Total de chunks: {report['total_chunks']}")
+        """Exibe relatório de processamento formatado (uma única escrita no log)."""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
+        lines = [
+            "\n" + "="*60,
+            "📊 RELATÓRIO DE PROCESSAMENTO",
+            "="*60,
+            f"📁 Documentos encontrados: {report['documents_found']}",
+            f"✅ Documentos processados: {report['documents_processed']}",
+            f"⏭️ Documentos pulados: {report['documents_skipped']}",
+            f"🧩 Total de chunks: {report['total_chunks']}"
+        ]
         
         if report['errors']:
-            print(f"❌ Erros: {len(report['errors'])}")
+            lines.append(f"❌ Erros: {len(report['errors'])}")
             for error in report['errors']:
-                print(f"   • {error['file']}: {error['error']}")
+                lines.append(f"   • {error['file']}: {error['error']}")
         
         if report['processed_files']:
-            print("\n📋 ARQUIVOS PROCESSADOS:")
+            lines.append("\n📋 ARQUIVOS PROCESSADOS:")
             for file_info in report['processed_files']:
-                print(f"   • {Path(file_info['file']).name}")
-                print(f"     Tipo: {file_info['type']}")
-                print(f"     Chunks: {file_info['chunks']}")
-                print(f"     Tempo: {file_info['processing_time']}")
+                lines.append(f"   • {Path(file_info['file']).name}")
+                lines.append(f"     Tipo: {file_info['type']}")
+                lines.append(f"     Chunks: {file_info['chunks']}")
+                lines.append(f"     Tempo: {file_info['processing_time']}")
         
         # Estatísticas do vector store
         vs_stats = self.vector_store.get_collection_stats()
-        print(f"\n🗂️ VECTOR STORE:")
-        print(f"   • Total chunks: {vs_stats.get('total_chunks', 0)}")
-        print(f"   • Documentos únicos: {vs_stats.get('unique_documents', 0)}")
-        print(f"   • Países cobertos: {vs_stats.get('countries_covered', 0)}")
-        print(f"   • Tópicos cobertos: {vs_stats.get('topics_covered', 0)}")
-        
-        print("="*60)
+        lines.append("\n🗂️ VECTOR STORE:")
+        lines.append(f"   • Total chunks: {vs_stats.get('total_chunks', 0)}")
+        lines.append(f"   • Documentos únicos: {vs_stats.get('unique_documents', 0)}")
+        lines.append(f"   • Países cobertos: {vs_stats.get('countries_covered', 0)}")
+        lines.append(f"   • Tópicos cobertos: {vs_stats.get('topics_covered', 0)}")
+        
+        lines.append("="*60)
+        logger.info("\n".join(lines))
     
     def list_available_documents(self) -> List[Dict[str, Any]]:
         """Lista documentos disponíveis para processamento."""
-        documents = []
-        
-        pdf_files = list(self.data_path.glob("*.pdf"))
-        md_files = list(self.data_path.glob("*.md"))
+        documents = [self._document_info(file_path) for file_path in self._list_files()]
+        return sorted(documents, key=lambda x: x["name"])
+    
+    def get_available_document(self, document_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém as informações de um documento disponível pelo nome.
         
-        for file_path in pdf_files + md_files:
-            file_key = str(file_path.name)
-            is_processed = file_key in self.processed_docs
-            
-            doc_info = {
-                "name": file_path.name,
-                "path": str(file_path),
-                "type": file_path.suffix.lower(),
-                "size_mb": round(file_path.stat().st_size / (1024 * 1024), 2),
-                "is_processed": is_processed
-            }
-            
-            if is_processed:
-                processed_info = self.processed_docs[file_key]
-                doc_info.update({
-                    "document_id": processed_info.get("document_id"),
-                    "chunks_count": processed_info.get("chunks_count"),
-                    "processed_at": processed_info.get("processed_at"),
-                    "countries": processed_info.get("countries", []),
-                    "topics": processed_info.get("topics", [])
-                })
+        Args:
+            document_name: Nome do arquivo
             
-            documents.append(doc_info)
+        Returns:
+            Dict: Informações do documento ou None
+        """
+        file_path = self._files_by_name().get(document_name)
+        if file_path is None:
+            return None
+        return self._document_info(file_path)
+    
+    def _document_info(self, file_path: Path) -> Dict[str, Any]:
+        """Monta as informações de um arquivo da pasta de dados."""
+        file_key = str(file_path.name)
+        is_processed = file_key in self.processed_docs
         
-        return sorted(documents, key=lambda x: x["name"])
+        # Tamanho lido na hora: sobrescrever um arquivo não altera o mtime da pasta
+        size = file_path.stat().st_size
+        
+        doc_info = {
+            "name": file_path.name,
+            "path": str(file_path),
+            "type": file_path.suffix.lower(),
+            "size_mb": round(size / (1024 * 1024), 2),
+            "is_processed": is_processed
+        }
+        
+        if is_processed:
+            processed_info = self.processed_docs[file_key]
+            doc_info.update({
+                "document_id": processed_info.get("document_id"),
+                "chunks_count": processed_info.get("chunks_count"),
+                "processed_at": processed_info.get("processed_at"),
+                "countries": processed_info.get("countries", []),
+                "topics": processed_info.get("topics", [])
+            })
+        
+        return doc_info
     
     def remove_document(self, document_name: str) -> bool:
         """
@@ -362,17 +789,17 @@ class DocumentManager:
                 # Remover do vector store
                 if self.vector_store.delete_document(document_id):
                     # Remover do registro
-                    del self.processed_docs[document_name]
+                    self._unregister(document_name)
                     self._save_processed_docs()
-                    print(f"✅ Documento '{document_name}' removido com sucesso")
+                    logger.info("✅ Documento '%s' removido com sucesso", document_name)
                     return True
                 else:
-                    print(f"❌ Erro ao remover '{document_name}' do vector store")
+                    logger.error("❌ Erro ao remover '%s' do vector store", document_name)
                     return False
                     
             except Exception as e:
-                print(f"❌ Erro ao remover documento: {str(e)}")
+                logger.error("❌ Erro ao remover documento: %s", e)
                 return False
         else:
-            print(f"⚠️ Documento '{document_name}' não encontrado no registro")
+            logger.warning("⚠️ Documento '%s' não encontrado no registro", document_name)
             return False
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Cache persistente de embeddings dos chunks.
+Evita recalcular o embedding de textos já vistos (reprocessamento, arquivos renomeados).
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Tuple
+
+import numpy as np
+
+
+# Limite de parâmetros por consulta no SQLite
+_SQLITE_MAX_PARAMS = 900
+
+
+class EmbeddingCache:
+    """
+    Cache SQLite de vetores float32 indexado pelo SHA-256 de modelo + texto.
+    
+    Uma camada LRU em memória atende os vetores mais usados sem ir ao SQLite.
+    """
+    
+    def __init__(self, cache_file: str = "./data/embedding_cache.sqlite", memory_entries: int = 4096):
+        """
+        Inicializa o cache de embeddings.
+        
+        Args:
+            cache_file: Arquivo SQLite onde os vetores são persistidos
+            memory_entries: Máximo de vetores mantidos na LRU em memória
+        """
+        self.cache_file = Path(cache_file)
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._conn = sqlite3.connect(str(self.cache_file), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS emb (hash BLOB PRIMARY KEY, vec BLOB)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(model: str, text: str) -> bytes:
+        """
+        Gera a chave SHA-256 de um texto.
+        
+        O modelo faz parte da chave para que a troca de modelo não reaproveite
+        vetores incompatíveis.
+        """
+        return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).digest()
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Retorna os vetores float32 em cache para as chaves informadas."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        
+        with self._lock:
+            # Primeiro a LRU em memória; só as chaves ausentes vão ao SQLite
+            pending = []
+            for key in unique_keys:
+                vec = self._memory.get(key)
+                if vec is None:
+                    pending.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vec
+            
+            for start in range(0, len(pending), _SQLITE_MAX_PARAMS):
+                batch = pending[start:start + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vec FROM emb WHERE hash IN ({placeholders})", batch
+                )
+                for key, vec in rows:
+                    found[key] = np.frombuffer(vec, dtype=np.float32)
+                    self._remember(key, found[key])
+        
+        self.hits += len(found)
+        self.misses += len(unique_keys) - len(found)
+        return found
+    
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]):
+        """Armazena vetores como bytes float32."""
+        # Cópia por vetor: linhas de uma matriz maior não a mantêm viva na LRU
+        items = [(key, np.array(vec, dtype=np.float32)) for key, vec in items]
+        if not items:
+            return
+        rows = [(key, vec.tobytes()) for key, vec in items]
+        
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO emb (hash, vec) VALUES (?, ?)", rows)
+            self._conn.commit()
+            for key, vec in items:
+                self._remember(key, vec)
+    
+    def clear(self):
+        """Descarta todos os vetores em cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM emb")
+            self._conn.commit()
+            self._memory.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "cache_file": str(self.cache_file)
+        }
+    
+    def _remember(self, key: bytes, vec: np.ndarray):
+        """Guarda o vetor na LRU em memória, descartando o menos usado se necessário."""
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
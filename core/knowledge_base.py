@@ -3,13 +3,17 @@ Base de conhecimento integrada do sistema tributário.
 Orquestra processamento, armazenamento e consulta.
 """
 
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 from .vector_store import TaxVectorStore
+from .embedding_cache import EmbeddingCache
+from .query_cache import QueryCache
 from .document_manager import DocumentManager
-from ..agents.tax_consultant import TaxConsultantAgent
+from ..agents.tax_consultant import TaxConsultantAgent, AGNO_ERROR_PREFIX
 from ..models.query import TaxQuery, QueryResponse
 
 
@@ -31,9 +35,15 @@ class TaxKnowledgeBase:
         # Inicializar componentes core
         print("🚀 Inicializando Base de Conhecimento Tributário...")
         
+        # Cache persistente de embeddings dos chunks
+        self.embedding_cache = EmbeddingCache(
+            cache_file=str(self.data_path / "embedding_cache.sqlite")
+        )
+        
         # Vector Store
         self.vector_store = TaxVectorStore(
-            db_path=str(self.data_path / "chroma_db")
+            db_path=str(self.data_path / "chroma_db"),
+            embedding_cache=self.embedding_cache
         )
         
         # Document Manager
@@ -42,6 +52,12 @@ class TaxKnowledgeBase:
             vector_store=self.vector_store
         )
         
+        # Cache em memória de consultas idênticas
+        self.query_cache = QueryCache()
+        
+        # Status do sistema memorizado por janela de 1s (health checks frequentes)
+        self._status_impl = lru_cache(maxsize=1)(self._compute_system_status)
+        
         # Agente Consultor
         self.tax_consultant = TaxConsultantAgent(
             vector_store=self.vector_store
@@ -73,6 +89,7 @@ class TaxKnowledgeBase:
             if process_documents:
                 # Processar todos os documentos
                 processing_report = self.document_manager.process_all_documents()
+                self._invalidate_caches()
                 setup_report["documents_processed"] = True
                 setup_report["processing_report"] = processing_report
             
@@ -112,11 +129,28 @@ class TaxKnowledgeBase:
         Returns:
             QueryResponse: Resposta estruturada
         """
-        return self.tax_consultant.query(
+        countries = countries or []
+        context = QueryCache.make_key(sorted(countries), sorted(kwargs.items()))
+        key = QueryCache.make_key(question, context)
+        
+        # Pergunta idêntica
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached.model_copy(update={"processing_time_ms": 0})
+        
+        response = self.tax_consultant.query(
             question=question,
-            countries=countries or [],
+            countries=countries,
             **kwargs
         )
+        
+        # Cachear apenas respostas fundamentadas, com busca real e sem falha do agente
+        if (response.search_results_count
+                and not response.degraded_search
+                and not response.answer.startswith(AGNO_ERROR_PREFIX)):
+            self.query_cache.put(key, response)
+        
+        return response
     
     def quick_query(self, question: str) -> str:
         """
@@ -167,6 +201,9 @@ class TaxKnowledgeBase:
                     "error": str(e)
                 })
         
+        if report["processed"]:
+            self._invalidate_caches()
+        
         return report
     
     def remove_document(self, document_name: str) -> bool:
@@ -179,7 +216,10 @@ class TaxKnowledgeBase:
         Returns:
             bool: Sucesso da operação
         """
-        return self.document_manager.remove_document(document_name)
+        removed = self.document_manager.remove_document(document_name)
+        if removed:
+            self._invalidate_caches()
+        return removed
     
     def reprocess_document(self, file_path: str) -> Dict[str, Any]:
         """
@@ -191,10 +231,23 @@ class TaxKnowledgeBase:
         Returns:
             Dict: Resultado do reprocessamento
         """
-        return self.document_manager.reprocess_document(Path(file_path))
+        try:
+            return self.document_manager.reprocess_document(Path(file_path))
+        finally:
+            # Após o reprocessamento: consultas concorrentes não repovoam o cache com dados antigos
+            self._invalidate_caches()
+    
+    def _invalidate_caches(self):
+        """Descarta respostas e status em cache após alterar a base de documentos."""
+        self.query_cache.clear()
+        self._status_impl.cache_clear()
     
     def get_system_status(self) -> Dict[str, Any]:
-        """Retorna status completo do sistema."""
+        """Retorna status completo do sistema (memorizado por até 1s)."""
+        return self._status_impl(int(time.monotonic()))
+    
+    def _compute_system_status(self, time_bucket: int) -> Dict[str, Any]:
+        """Calcula o status do sistema; time_bucket só diferencia as janelas do cache."""
         
         # Status do processamento de documentos
         doc_status = self.document_manager.get_processing_status()
@@ -250,13 +303,7 @@ class TaxKnowledgeBase:
         Returns:
             Dict: Informações do documento ou None
         """
-        available_docs = self.document_manager.list_available_documents()
-        
-        for doc in available_docs:
-            if doc["name"] == document_name:
-                return doc
-        
-        return None
+        return self.document_manager.get_available_document(document_name)
     
     def list_countries(self) -> List[str]:
         """Lista países disponíveis na base."""
@@ -307,11 +354,10 @@ class TaxKnowledgeBase:
         try:
             # Reset do vector store
             vs_reset = self.vector_store.reset_collection()
+            self._invalidate_caches()
             
             # Limpar registro de documentos processados
-            if hasattr(self.document_manager, 'processed_docs'):
-                self.document_manager.processed_docs = {}
-                self.document_manager._save_processed_docs()
+            self.document_manager.clear_registry()
             
             if vs_reset:
                 print("✅ Sistema resetado com sucesso")
@@ -333,8 +379,10 @@ class TaxKnowledgeBase:
         }
         
         try:
+            status = self.get_system_status()
+            
             # Verificar vector store
-            vs_stats = self.vector_store.get_collection_stats()
+            vs_stats = status["vector_store"]
             if vs_stats.get("total_chunks", 0) == 0:
                 health["issues"].append("Nenhum documento processado na base vetorial")
                 health["recommendations"].append("Execute setup() para processar documentos")
@@ -349,7 +397,7 @@ class TaxKnowledgeBase:
                 health["recommendations"].append("Processe documentos pendentes")
             
             # Verificar agente
-            agent_status = self.tax_consultant.get_status()
+            agent_status = status["agent"]
             if not agent_status.get("agno_enabled"):
                 health["issues"].append("Agente Agno não disponível")
                 health["recommendations"].append("Instale Agno para funcionalidade completa")
@@ -0,0 +1,89 @@
+"""
+Cache em memória de respostas por consulta.
+Reaproveita respostas de perguntas idênticas (mesma pergunta e mesmo contexto).
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from ..models.query import QueryResponse
+
+
+class QueryCache:
+    """LRU com expiração (TTL) de respostas indexado pela chave exata da consulta."""
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 900):
+        """
+        Inicializa o cache de consultas.
+        
+        Args:
+            max_entries: Máximo de respostas mantidas (as menos usadas saem primeiro)
+            ttl_seconds: Tempo de validade de cada resposta
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        
+        # chave -> (instante de expiração, resposta)
+        self._entries: "OrderedDict[str, Tuple[float, QueryResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Gera a chave SHA-256 de uma consulta.
+        
+        Args:
+            *parts: Componentes que identificam a consulta (pergunta, países, tipo...)
+        
+        Returns:
+            str: Hash hexadecimal da consulta
+        """
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[QueryResponse]:
+        """Retorna a resposta da consulta idêntica ou None (ausente ou expirada)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: str, response: QueryResponse):
+        """Armazena uma resposta, descartando a menos usada se necessário."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Descarta todas as respostas (ex.: após alterar a base de documentos)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do cache."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
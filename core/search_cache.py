@@ -0,0 +1,75 @@
+"""
+Cache em memória dos resultados de busca do vector store.
+Evita repetir o embedding da pergunta e a consulta ao ChromaDB para buscas idênticas.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class SearchCache:
+    """LRU com expiração (TTL) de resultados de busca."""
+    
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 300):
+        """
+        Inicializa o cache de buscas.
+        
+        Args:
+            max_size: Máximo de buscas mantidas (as menos usadas saem primeiro)
+            ttl_seconds: Tempo de validade de cada resultado
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        
+        # chave -> (instante de expiração, resultados)
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Retorna uma cópia dos resultados em cache ou None (ausente ou expirado)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+    
+    def put(self, key: Tuple, results: List[Dict[str, Any]]):
+        """Armazena os resultados de uma busca, descartando a menos usada se necessário."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, list(results))
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Descarta todas as buscas (ex.: após alterar a coleção)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do cache."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -3,12 +3,22 @@ Sistema de armazenamento vetorial com ChromaDB.
 Otimizado para consultas tributárias com metadados estruturados.
 """
 
+import gzip
 import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, FrozenSet, Sequence, Union
 from datetime import datetime
 import json
 
+import numpy as np
+
 try:
     import chromadb
     from chromadb.config import Settings
@@ -22,8 +32,62 @@ try:
 except ImportError:
     OPENAI_AVAILABLE = False
 
-from ..models.chunk import Chunk
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    # orjson é opcional: sem ele o backup usa o json da biblioteca padrão
+    ORJSON_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+from ..models.chunk import Chunk, ChunkCore, to_chromadb_batch
 from ..models.query import TaxQuery
+from .embedding_cache import EmbeddingCache
+from .search_cache import SearchCache
+
+
+# Condições da pergunta que ativam boosts de relevância (substring, sem distinção de caixa)
+_DIGIT_RE = re.compile(r"\d")
+_LEGAL_TERMS_RE = re.compile(r"lei|artigo|decreto", re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def _parse_list(value: str) -> FrozenSet[str]:
+    """
+    Converte um metadado "a,b,c" em conjunto.
+    
+    Memorizado: os mesmos valores de países/tópicos se repetem entre chunks e
+    buscas, então cada string é separada uma única vez.
+    """
+    return frozenset(value.split(","))
+
+
+# Dimensão dos vetores do modelo padrão (text-embedding-3-small), usada nos
+# vetores dummy enquanto nenhum vetor real foi obtido
+EMBEDDING_DIMENSIONS = 1536
+
+# Máximo de textos por requisição de embeddings (limite da API: 2048)
+EMBEDDING_BATCH_SIZE = 512
+
+# Limites de tokens da API de embeddings: por texto e por requisição
+EMBEDDING_MAX_ITEM_TOKENS = 8192
+EMBEDDING_MAX_REQUEST_TOKENS = 300_000
+
+# Embeddings de perguntas mantidos em memória (LRU)
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# Registros por página ao agregar metadados da coleção
+STATS_PAGE_SIZE = 10_000
+
+# Chunks por chamada de collection.add
+CHROMA_BATCH_SIZE = 500
+
+# Tentativas por lote quando a API responde 429 (rate limit)
+EMBEDDING_MAX_RETRIES = 5
 
 
 class TaxVectorStore:
@@ -32,7 +96,10 @@ class TaxVectorStore:
     def __init__(self, 
                  db_path: str = "./data/chroma_db",
                  collection_name: str = "tax_knowledge",
-                 embedding_model: str = "text-embedding-3-small"):
+                 embedding_model: str = "text-embedding-3-small",
+                 embedding_cache: Optional[EmbeddingCache] = None,
+                 max_concurrent_requests: int = 8,
+                 search_cache_config: Optional[Dict[str, Any]] = None):
         """
         Inicializa o store vetorial.
         
@@ -40,6 +107,9 @@ class TaxVectorStore:
             db_path: Caminho para o banco ChromaDB
             collection_name: Nome da coleção
             embedding_model: Modelo de embeddings OpenAI
+            embedding_cache: Cache persistente de embeddings dos chunks (opcional)
+            max_concurrent_requests: Lotes de embeddings enviados simultaneamente
+            search_cache_config: Parâmetros do cache de buscas (max_size, ttl_seconds)
         """
         if not CHROMADB_AVAILABLE:
             raise ImportError("ChromaDB não instalado. Execute: pip install chromadb")
@@ -50,15 +120,53 @@ class TaxVectorStore:
         self.db_path = Path(db_path)
         self.collection_name = collection_name
         self.embedding_model = embedding_model
+        self.embedding_cache = embedding_cache
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self._embedding_dim = EMBEDDING_DIMENSIONS
+        self.search_cache = SearchCache(**(search_cache_config or {}))
+        # Agregados de metadados da coleção (recalculados após alterações)
+        self._metadata_stats: Optional[Dict[str, Any]] = None
+        # Pergunta -> embedding (perguntas repetidas não voltam à API)
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
         
         # Configurar OpenAI
         if not os.getenv("OPENAI_API_KEY"):
             raise ValueError("OPENAI_API_KEY não configurada no .env")
         
-        self.openai_client = openai.OpenAI()
-        
-        # Inicializar ChromaDB
-        self._initialize_chromadb()
+        # Clientes OpenAI e ChromaDB criados no primeiro uso (ver propriedades)
+        self._openai_client = None
+        self._client = None
+        self._collection = None
+        self._init_lock = threading.Lock()
+    
+    @property
+    def openai_client(self):
+        """Cliente OpenAI, criado no primeiro uso."""
+        if self._openai_client is None:
+            with self._init_lock:
+                if self._openai_client is None:
+                    self._openai_client = openai.OpenAI()
+        return self._openai_client
+    
+    @property
+    def client(self):
+        """Cliente ChromaDB, aberto no primeiro uso."""
+        self._ensure_chromadb()
+        return self._client
+    
+    @property
+    def collection(self):
+        """Coleção ChromaDB, carregada ou criada no primeiro uso."""
+        self._ensure_chromadb()
+        return self._collection
+    
+    def _ensure_chromadb(self):
+        """Inicializa o ChromaDB uma única vez, mesmo com acessos concorrentes."""
+        if self._collection is None:
+            with self._init_lock:
+                if self._collection is None:
+                    self._initialize_chromadb()
     
     def _initialize_chromadb(self):
         """Inicializa o cliente ChromaDB e coleção."""
@@ -66,7 +174,7 @@ class TaxVectorStore:
         self.db_path.mkdir(parents=True, exist_ok=True)
         
         # Configurar ChromaDB para persistência
-        self.client = chromadb.PersistentClient(
+        self._client = chromadb.PersistentClient(
             path=str(self.db_path),
             settings=Settings(
                 anonymized_telemetry=False,
@@ -76,12 +184,12 @@ class TaxVectorStore:
         
         # Obter ou criar coleção
         try:
-            self.collection = self.client.get_collection(
+            self._collection = self._client.get_collection(
                 name=self.collection_name
             )
             print(f"✅ Coleção '{self.collection_name}' carregada")
         except:
-            self.collection = self.client.create_collection(
+            self._collection = self._client.create_collection(
                 name=self.collection_name,
                 metadata={
                     "description": "Base de conhecimento tributário internacional",
@@ -91,7 +199,7 @@ class TaxVectorStore:
             )
             print(f"✅ Coleção '{self.collection_name}' criada")
     
-    def add_chunks(self, chunks: List[Chunk]) -> bool:
+    def add_chunks(self, chunks: Sequence[Union[Chunk, ChunkCore]]) -> bool:
         """
         Adiciona chunks à base vetorial.
         
@@ -105,44 +213,27 @@ class TaxVectorStore:
             return True
         
         try:
-            # Preparar dados para ChromaDB
-            ids = []
-            documents = []
-            metadatas = []
-            embeddings = []
-            
-            for chunk in chunks:
-                # Gerar embedding
-                embedding = self._generate_embedding(chunk.text)
-                
-                # Preparar metadados para ChromaDB
-                metadata = {
-                    "document_id": chunk.metadata.document_id,
-                    "page_number": chunk.metadata.page_number or 0,
-                    "section": chunk.metadata.section or "",
-                    "countries": ",".join(chunk.metadata.detected_countries),
-                    "topics": ",".join(chunk.metadata.detected_topics),
-                    "has_numbers": chunk.metadata.has_numbers,
-                    "has_dates": chunk.metadata.has_dates,
-                    "has_legal_refs": chunk.metadata.has_legal_refs,
-                    "text_quality": chunk.metadata.text_quality,
-                    "information_density": chunk.metadata.information_density,
-                    "created_at": chunk.created_at.isoformat(),
-                    "char_length": len(chunk.text)
-                }
+            # Pipeline por fatias: enquanto o ChromaDB grava uma fatia (disco),
+            # os embeddings da próxima são gerados (rede). Apenas uma gravação
+            # fica pendente, limitando a memória a duas fatias.
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="chroma-writer") as writer:
+                pending_write = None
+                for start in range(0, len(chunks), CHROMA_BATCH_SIZE):
+                    # Lote no formato do ChromaDB (ids, documents, metadatas)
+                    batch = to_chromadb_batch(chunks[start:start + CHROMA_BATCH_SIZE])
+                    
+                    # Gerar embeddings em lote (uma requisição por bloco de textos)
+                    embeddings = self._generate_embeddings(batch["documents"])
+                    
+                    if pending_write is not None:
+                        pending_write.result()
+                    pending_write = writer.submit(
+                        self.collection.add,
+                        **batch,
+                        embeddings=embeddings.tolist()
+                    )
                 
-                ids.append(chunk.id)
-                documents.append(chunk.text)
-                metadatas.append(metadata)
-                embeddings.append(embedding)
-            
-            # Adicionar à coleção
-            self.collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas,
-                embeddings=embeddings
-            )
+                pending_write.result()
             
             print(f"✅ {len(chunks)} chunks adicionados à base vetorial")
             return True
@@ -150,6 +241,10 @@ class TaxVectorStore:
         except Exception as e:
             print(f"❌ Erro ao adicionar chunks: {str(e)}")
             return False
+        
+        finally:
+            # Mesmo uma gravação parcial altera os resultados de busca
+            self._invalidate_caches()
     
     def search(self, 
                query: TaxQuery, 
@@ -164,16 +259,42 @@ class TaxVectorStore:
         Returns:
             List[Dict]: Chunks encontrados com scores
         """
+        return self.search_with_status(query, n_results)[0]
+    
+    def search_with_status(self, 
+                           query: TaxQuery, 
+                           n_results: int = 10) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Busca chunks relevantes e indica se a busca foi degradada.
+        
+        Args:
+            query: Query estruturada
+            n_results: Número máximo de resultados
+            
+        Returns:
+            Tuple: (chunks encontrados com scores, True se o embedding da
+            pergunta falhou ou a busca deu erro)
+        """
+        cache_key = self._search_key(query, n_results)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return cached, False
+        
         try:
             # Gerar embedding da query
-            query_embedding = self._generate_embedding(query.question)
+            query_embedding = self.embed_query(query.question)
+            
+            # Vetor dummy (falha na API): vizinhos sem sentido, não consultar nem cachear
+            if not query_embedding.any():
+                print("⚠️ Embedding da pergunta indisponível: busca ignorada")
+                return [], True
             
             # Preparar filtros de metadados
             where_filters = self._build_metadata_filters(query)
             
             # Executar busca
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=[query_embedding.tolist()],
                 n_results=min(n_results, 50),  # Máximo 50 resultados
                 where=where_filters if where_filters else None,
                 include=["documents", "metadatas", "distances"]
@@ -183,46 +304,216 @@ class TaxVectorStore:
             processed_results = []
             
             if results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    metadata = results['metadatas'][0][i]
-                    distance = results['distances'][0][i]
-                    
-                    # Converter distância em score de similaridade (0-1)
-                    similarity_score = max(0, 1 - distance)
-                    
-                    # Aplicar boost baseado em filtros da query
-                    boost_score = self._calculate_relevance_boost(metadata, query)
-                    final_score = min(1.0, similarity_score + boost_score)
-                    
-                    processed_results.append({
-                        "text": doc,
-                        "metadata": metadata,
-                        "similarity_score": similarity_score,
-                        "relevance_score": final_score,
-                        "distance": distance
-                    })
-            
-            # Ordenar por relevância final
-            processed_results.sort(key=lambda x: x["relevance_score"], reverse=True)
+                documents = results['documents'][0]
+                metadatas = results['metadatas'][0]
+                distances = np.asarray(results['distances'][0], dtype=np.float64)
+                
+                # Converter distância em score de similaridade (0-1)
+                similarity_scores = np.maximum(0.0, 1.0 - distances)
+                
+                # Aplicar boost baseado em filtros da query (todos os candidatos de uma vez)
+                boost_scores = self._relevance_boosts(metadatas, query)
+                final_scores = np.minimum(1.0, similarity_scores + boost_scores)
+                
+                # Ordenar por relevância final (estável, como o sort anterior)
+                order = np.argsort(-final_scores, kind="stable")
+                
+                similarity_list = similarity_scores.tolist()
+                final_list = final_scores.tolist()
+                distance_list = distances.tolist()
+                processed_results = [
+                    {
+                        "text": documents[i],
+                        "metadata": metadatas[i],
+                        "similarity_score": similarity_list[i],
+                        "relevance_score": final_list[i],
+                        "distance": distance_list[i]
+                    }
+                    for i in order.tolist()
+                ]
             
-            return processed_results
+            self.search_cache.put(cache_key, processed_results)
+            return processed_results, False
             
         except Exception as e:
             print(f"❌ Erro na busca: {str(e)}")
-            return []
+            return [], True
     
-    def _generate_embedding(self, text: str) -> List[float]:
-        """Gera embedding usando OpenAI."""
-        try:
-            response = self.openai_client.embeddings.create(
-                input=text,
-                model=self.embedding_model
+    @staticmethod
+    def _search_key(query: TaxQuery, n_results: int) -> Tuple:
+        """Chave da busca: campos normalizados que alteram o resultado."""
+        return (
+            " ".join(query.question.split()),
+            tuple(sorted(query.target_countries)),
+            query.min_confidence,
+            n_results
+        )
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        """
+        Gera o embedding de uma pergunta.
+        
+        Perguntas repetidas (texto idêntico) são atendidas por uma LRU em
+        memória. O cache persistente fica restrito aos chunks: perguntas não
+        entram no SQLite, que assim cresce com o corpus e não com o tráfego.
+        """
+        with self._query_embeddings_lock:
+            vector = self._query_embeddings.get(text)
+            if vector is not None:
+                self._query_embeddings.move_to_end(text)
+                return vector
+        
+        vector = self._generate_embedding(text)
+        
+        # Vetores dummy (falha na API, todos zero) não são memorizados
+        if vector.any():
+            vector.setflags(write=False)
+            with self._query_embeddings_lock:
+                self._query_embeddings[text] = vector
+                if len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                    self._query_embeddings.popitem(last=False)
+        return vector
+    
+    def _generate_embedding(self, text: str) -> np.ndarray:
+        """Gera embedding usando OpenAI (lote de um único texto)."""
+        return self._request_embeddings([text])[0][0]
+    
+    def _generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Gera embeddings de vários textos como matriz float32 (N, d).
+        
+        Textos presentes no cache de embeddings são reaproveitados; os demais
+        são enviados à API com uma requisição por lote e gravados no cache.
+        """
+        if self.embedding_cache is None:
+            return self._request_embeddings(texts)[0]
+        
+        keys = [EmbeddingCache.make_key(self.embedding_model, text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
+        if cached:
+            self._embedding_dim = len(next(iter(cached.values())))
+        
+        # Apenas textos inéditos (sem repetição) vão para a API
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            vectors, ok = self._request_embeddings(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            # Vetores dummy de lotes com erro não vão para o cache
+            self.embedding_cache.put_many(
+                (key, vec) for (key, vec), good in zip(fresh.items(), ok) if good
             )
-            return response.data[0].embedding
-        except Exception as e:
-            print(f"❌ Erro ao gerar embedding: {str(e)}")
-            # Retornar embedding dummy em caso de erro
-            return [0.0] * 1536  # text-embedding-3-small tem 1536 dimensões
+            cached.update(fresh)
+        
+        return np.stack([cached[key] for key in keys])
+    
+    def _request_embeddings(self, texts: List[str]) -> Tuple[np.ndarray, List[bool]]:
+        """
+        Chama a API de embeddings com uma requisição por lote de textos.
+        
+        Returns:
+            Tuple: (matriz float32 (N, d), indicação por texto de que o vetor é real e não o dummy)
+        """
+        batches = self._pack_batches(texts)
+        workers = min(self.max_concurrent_requests, len(batches))
+        if workers <= 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            # Requisições de rede: lotes em paralelo para sobrepor a latência
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self._embed_batch, batches))
+        
+        # Dimensão dos vetores dummy igual à dos vetores reais
+        self._embedding_dim = next(
+            (vectors.shape[1] for vectors in results if vectors is not None), self._embedding_dim
+        )
+        
+        blocks = []
+        ok = []
+        for batch, vectors in zip(batches, results):
+            good = vectors is not None
+            if not good:
+                # Retornar embedding dummy em caso de erro
+                vectors = np.zeros((len(batch), self._embedding_dim), dtype=np.float32)
+            blocks.append(vectors)
+            ok.extend([good] * len(batch))
+        
+        if not blocks:
+            return np.empty((0, self._embedding_dim), dtype=np.float32), ok
+        return np.vstack(blocks), ok
+    
+    def _embed_batch(self, batch: List[str]) -> Optional[np.ndarray]:
+        """
+        Gera os embeddings de um lote, com backoff exponencial em caso de rate limit.
+        
+        Returns:
+            Optional[np.ndarray]: Matriz float32 do lote, ou None se a requisição falhar
+        """
+        for attempt in range(EMBEDDING_MAX_RETRIES):
+            try:
+                response = self.openai_client.embeddings.create(
+                    input=batch,
+                    model=self.embedding_model
+                )
+                data = sorted(response.data, key=lambda d: d.index)
+                return np.array([item.embedding for item in data], dtype=np.float32)
+            except openai.RateLimitError as e:
+                if attempt == EMBEDDING_MAX_RETRIES - 1:
+                    print(f"❌ Erro ao gerar embeddings em lote: {str(e)}")
+                    break
+                time.sleep(2 ** attempt + random.random())
+            except Exception as e:
+                print(f"❌ Erro ao gerar embeddings em lote: {str(e)}")
+                break
+        
+        return None
+    
+    def _pack_batches(self, texts: List[str]) -> List[List[str]]:
+        """
+        Agrupa os textos em lotes respeitando os limites da API.
+        
+        Empacota gulosamente até EMBEDDING_BATCH_SIZE textos e
+        EMBEDDING_MAX_REQUEST_TOKENS tokens por requisição. Textos acima do
+        limite individual vão sozinhos, para que a falha não afete os demais.
+        """
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for text in texts:
+            tokens = self._count_tokens(text)
+            oversized = tokens > EMBEDDING_MAX_ITEM_TOKENS
+            if batch and (oversized or len(batch) >= EMBEDDING_BATCH_SIZE
+                          or batch_tokens + tokens > EMBEDDING_MAX_REQUEST_TOKENS):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            if oversized:
+                batches.append([text])
+                continue
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def _count_tokens(self, text: str) -> int:
+        """Conta os tokens do texto (estimativa de ~4 caracteres por token sem tiktoken)."""
+        if self._tokenizer is None:
+            return len(text) // 4 + 1
+        return len(self._tokenizer.encode(text, disallowed_special=()))
+    
+    @cached_property
+    def _tokenizer(self):
+        """Tokenizer do modelo de embeddings (carregado no primeiro uso), se o tiktoken estiver disponível."""
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        try:
+            return tiktoken.encoding_for_model(self.embedding_model)
+        except Exception:
+            return tiktoken.get_encoding("cl100k_base")
     
     def _build_metadata_filters(self, query: TaxQuery) -> Optional[Dict[str, Any]]:
         """Constrói filtros de metadados baseados na query."""
@@ -249,65 +540,89 @@ class TaxVectorStore:
         
         return filters if filters else None
     
-    def _calculate_relevance_boost(self, metadata: Dict[str, Any], query: TaxQuery) -> float:
-        """Calcula boost de relevância baseado em correspondências."""
-        boost = 0.0
+    def _relevance_boosts(self, metadatas: List[Dict[str, Any]], query: TaxQuery) -> np.ndarray:
+        """Calcula o boost de relevância de cada candidato baseado em correspondências."""
+        count = len(metadatas)
+        boosts = np.zeros(count, dtype=np.float64)
         
         # Boost por países correspondentes
         if query.target_countries:
-            chunk_countries = metadata.get("countries", "").split(",")
-            matching_countries = set(query.target_countries) & set(chunk_countries)
-            if matching_countries:
-                boost += 0.2 * (len(matching_countries) / len(query.target_countries))
+            target_countries = set(query.target_countries)
+            matches = np.fromiter(
+                (len(target_countries.intersection(_parse_list(metadata.get("countries", ""))))
+                 for metadata in metadatas),
+                dtype=np.float64, count=count
+            )
+            boosts += 0.2 * (matches / len(query.target_countries))
         
-        # Boost por características especiais
-        if metadata.get("has_numbers") and any(char.isdigit() for char in query.question):
-            boost += 0.1
+        # Boost por características especiais (condições da query avaliadas uma vez)
+        if _DIGIT_RE.search(query.question):
+            has_numbers = np.fromiter((bool(m.get("has_numbers")) for m in metadatas), dtype=bool, count=count)
+            boosts += np.where(has_numbers, 0.1, 0.0)
         
-        if metadata.get("has_legal_refs") and any(term in query.question.lower() 
-                                                 for term in ["lei", "artigo", "decreto"]):
-            boost += 0.1
+        if _LEGAL_TERMS_RE.search(query.question):
+            has_legal_refs = np.fromiter((bool(m.get("has_legal_refs")) for m in metadatas), dtype=bool, count=count)
+            boosts += np.where(has_legal_refs, 0.1, 0.0)
         
         # Boost por qualidade alta
-        if metadata.get("text_quality", 0) > 0.8:
-            boost += 0.05
+        quality = np.fromiter((m.get("text_quality", 0) for m in metadatas), dtype=np.float64, count=count)
+        boosts += np.where(quality > 0.8, 0.05, 0.0)
         
-        return boost
+        return boosts
     
     def get_collection_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas da coleção."""
         try:
             count = self.collection.count()
             
-            # Buscar alguns metadados para estatísticas
-            sample = self.collection.get(limit=min(100, count))
-            
-            countries = set()
-            topics = set()
-            documents = set()
-            
-            if sample['metadatas']:
-                for metadata in sample['metadatas']:
-                    if metadata.get('countries'):
-                        countries.update(metadata['countries'].split(','))
-                    if metadata.get('topics'):
-                        topics.update(metadata['topics'].split(','))
-                    if metadata.get('document_id'):
-                        documents.add(metadata['document_id'])
+            # Agregados da coleção inteira, reaproveitados até a próxima alteração
+            metadata_stats = self._metadata_stats
+            if metadata_stats is None or metadata_stats["total_chunks"] != count:
+                metadata_stats = self._metadata_stats = self._aggregate_metadata(count)
             
             return {
-                "total_chunks": count,
-                "unique_documents": len(documents),
-                "countries_covered": len([c for c in countries if c.strip()]),
-                "topics_covered": len([t for t in topics if t.strip()]),
+                **metadata_stats,
                 "collection_name": self.collection_name,
                 "embedding_model": self.embedding_model,
-                "db_path": str(self.db_path)
+                "db_path": str(self.db_path),
+                "search_cache": self.search_cache.get_stats()
             }
             
         except Exception as e:
             return {"error": str(e)}
     
+    def _aggregate_metadata(self, count: int) -> Dict[str, Any]:
+        """
+        Agrega documentos, países e tópicos de toda a coleção.
+        
+        Percorre a coleção em páginas trazendo apenas os metadados (sem textos
+        nem embeddings), mantendo apenas os conjuntos acumulados em memória.
+        """
+        countries = set()
+        topics = set()
+        documents = set()
+        
+        for offset in range(0, count, STATS_PAGE_SIZE):
+            page = self.collection.get(include=["metadatas"], limit=STATS_PAGE_SIZE, offset=offset)
+            metadatas = page['metadatas'] or []
+            
+            # Cada valor distinto de países/tópicos é separado uma única vez
+            countries.update(*map(_parse_list, {m['countries'] for m in metadatas if m.get('countries')}))
+            topics.update(*map(_parse_list, {m['topics'] for m in metadatas if m.get('topics')}))
+            documents.update(m['document_id'] for m in metadatas if m.get('document_id'))
+        
+        return {
+            "total_chunks": count,
+            "unique_documents": len(documents),
+            "countries_covered": len([c for c in countries if c.strip()]),
+            "topics_covered": len([t for t in topics if t.strip()])
+        }
+    
+    def _invalidate_caches(self):
+        """Descarta buscas e agregados em cache após alterar a coleção."""
+        self.search_cache.clear()
+        self._metadata_stats = None
+    
     def delete_document(self, document_id: str) -> bool:
         """Remove todos os chunks de um documento."""
         try:
@@ -318,6 +633,7 @@ class TaxVectorStore:
             
             if results['ids']:
                 self.collection.delete(ids=results['ids'])
+                self._invalidate_caches()
                 print(f"✅ {len(results['ids'])} chunks do documento '{document_id}' removidos")
                 return True
             else:
@@ -332,7 +648,9 @@ class TaxVectorStore:
         """Reseta a coleção (apaga todos os dados)."""
         try:
             self.client.delete_collection(self.collection_name)
-            self._initialize_chromadb()
+            self._invalidate_caches()
+            with self._init_lock:
+                self._initialize_chromadb()
             print("✅ Coleção resetada com sucesso")
             return True
         except Exception as e:
@@ -340,7 +658,7 @@ class TaxVectorStore:
             return False
     
     def backup_collection(self, backup_path: str) -> bool:
-        """Faz backup da coleção."""
+        """Faz backup da coleção (JSON compacto comprimido com gzip)."""
         try:
             backup_dir = Path(backup_path)
             backup_dir.mkdir(parents=True, exist_ok=True)
@@ -348,15 +666,24 @@ class TaxVectorStore:
             # Exportar todos os dados
             all_data = self.collection.get()
             
-            backup_file = backup_dir / f"tax_knowledge_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            backup_file = backup_dir / f"tax_knowledge_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz"
             
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "collection_name": self.collection_name,
-                    "embedding_model": self.embedding_model,
-                    "backup_date": datetime.now().isoformat(),
-                    "data": all_data
-                }, f, ensure_ascii=False, indent=2)
+            payload = {
+                "collection_name": self.collection_name,
+                "embedding_model": self.embedding_model,
+                "backup_date": datetime.now().isoformat(),
+                "data": all_data
+            }
+            
+            # Sem indentação (arquivo menor e leitura mais rápida); compressão
+            # leve (nível 3) para não tornar o backup limitado por CPU
+            if ORJSON_AVAILABLE:
+                # Serialização em C, gravada diretamente como bytes UTF-8
+                with gzip.open(backup_file, 'wb', compresslevel=3) as f:
+                    f.write(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
+            else:
+                with gzip.open(backup_file, 'wt', encoding='utf-8', compresslevel=3) as f:
+                    json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
             
             print(f"✅ Backup salvo em: {backup_file}")
             return True
@@ -6,15 +6,34 @@ import os
 import shutil
 import unicodedata
 import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Padrões compilados uma única vez (usados para cada membro do ZIP)
+_INVALID_CHARS_RE = re.compile(r'[^\w\s\-_\.]')
+_SEPARATORS_RE = re.compile(r'[-\s]+')
 
 def sanitize_filename(filename):
     """Sanitiza nome de arquivo removendo caracteres problemáticos"""
     # Remove caracteres de controle e substitui caracteres problemáticos
     filename = unicodedata.normalize('NFKD', filename)
-    filename = re.sub(r'[^\w\s\-_\.]', '', filename)
-    filename = re.sub(r'[-\s]+', '-', filename)
+    filename = _INVALID_CHARS_RE.sub('', filename)
+    filename = _SEPARATORS_RE.sub('-', filename)
     return filename.strip('-_')
 
+def _extract_members(zip_path, jobs):
+    """Extrai os membros atribuídos a uma thread, com handle próprio do ZIP"""
+    results = {}
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for index, member, target_path in jobs:
+            try:
+                # Cópia em blocos de 1 MB: o membro não é carregado inteiro na memória
+                with zip_ref.open(member) as source, open(target_path, 'wb') as target:
+                    shutil.copyfileobj(source, target, length=1024 * 1024)
+                results[index] = None
+            except Exception as e:
+                results[index] = e
+    return results
+
 def extract_rag_zip():
     """Extrai o arquivo ZIP do RAG Tributária"""
     zip_path = '/Users/esausamuellimafeitosa/meus-projetos-claude/projetos-python/sistema-agentes-tributarios/data/rag_tributaria.zip'
@@ -28,6 +47,10 @@ def extract_rag_zip():
     extracted_files = []
     
     try:
+        # 1) Planejamento sequencial: nomes e destinos únicos definidos antes
+        #    da extração, para que as threads não disputem o mesmo arquivo
+        planned = []
+        reserved = set()
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
             for member in zip_ref.namelist():
                 try:
@@ -47,13 +70,14 @@ def extract_rag_zip():
                     safe_name = sanitize_filename(safe_name)
                     
                     if not safe_name or safe_name == '.':
-                        safe_name = f'documento_{len(extracted_files)}'
+                        safe_name = f'documento_{len(planned)}'
                     
                     # Define extensão se não tiver
                     if '.' not in safe_name:
-                        # Verifica se é PDF pelo conteúdo
-                        content = zip_ref.read(member)
-                        if content.startswith(b'%PDF'):
+                        # Verifica se é PDF pelo conteúdo (apenas os 4 primeiros bytes)
+                        with zip_ref.open(member) as source:
+                            head = source.read(4)
+                        if head == b'%PDF':
                             safe_name += '.pdf'
                         else:
                             safe_name += '.txt'
@@ -63,23 +87,35 @@ def extract_rag_zip():
                     # Evita sobrescrever arquivos
                     counter = 1
                     original_path = target_path
-                    while os.path.exists(target_path):
+                    while target_path in reserved or os.path.exists(target_path):
                         name, ext = os.path.splitext(original_path)
                         target_path = f"{name}_{counter}{ext}"
                         counter += 1
                     
-                    # Extrai o arquivo
-                    with zip_ref.open(member) as source:
-                        content = source.read()
-                        with open(target_path, 'wb') as target:
-                            target.write(content)
-                    
-                    extracted_files.append(safe_name)
-                    print(f"✅ Extraído: {safe_name}")
+                    reserved.add(target_path)
+                    planned.append((member, safe_name, target_path))
                     
                 except Exception as e:
                     print(f"❌ Erro ao extrair {member}: {e}")
                     continue
+        
+        # 2) Extração paralela: o zlib libera o GIL durante a descompressão.
+        #    Cada thread usa seu próprio handle do ZIP (ZipFile não é thread-safe).
+        workers = max(1, min(os.cpu_count() or 1, len(planned)))
+        jobs = [(index, member, target_path) for index, (member, _, target_path) in enumerate(planned)]
+        assignments = [jobs[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = {}
+            for done in executor.map(lambda jobs: _extract_members(zip_path, jobs), assignments):
+                results.update(done)
+        
+        for index, (member, safe_name, _) in enumerate(planned):
+            error = results[index]
+            if error is None:
+                extracted_files.append(safe_name)
+                print(f"✅ Extraído: {safe_name}")
+            else:
+                print(f"❌ Erro ao extrair {member}: {error}")
     
     except Exception as e:
         print(f"❌ Erro ao abrir ZIP: {e}")
@@ -8,31 +8,58 @@ import os
 import json
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any
+from typing import Dict, Any, Iterable, Iterator
 import hashlib
 from datetime import datetime
+from itertools import chain
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    # orjson é opcional: sem ele os arquivos são lidos com o json da biblioteca padrão
+    ORJSON_AVAILABLE = False
+
+# Parâmetros do índice HNSW (só têm efeito na criação da coleção)
+HNSW_CONFIG = {
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 100,
+    "hnsw:M": 16
+}
 
 def generate_chunk_id(content: str, metadata: Dict[str, Any], chunk_index: int) -> str:
     """Gera um ID único para o chunk baseado no conteúdo, metadados e índice"""
     source_string = f"{metadata.get('filename', '')}{chunk_index}{content[:100]}"
-    return hashlib.md5(source_string.encode()).hexdigest()
+    # MD5 mantido para que os IDs já gravados na coleção continuem os mesmos;
+    # usedforsecurity=False evita a checagem FIPS (uso apenas como identificador)
+    return hashlib.md5(source_string.encode(), usedforsecurity=False).hexdigest()
+
+def _load_json(path: str) -> Any:
+    """Lê um arquivo JSON (orjson quando disponível)"""
+    if ORJSON_AVAILABLE:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-def load_processed_documents(processed_dir: str) -> List[Dict[str, Any]]:
-    """Carrega documentos processados do diretório"""
-    documents = []
+def load_processed_documents(processed_dir: str) -> Iterator[Dict[str, Any]]:
+    """
+    Carrega documentos processados do diretório.
     
+    Gerador: cada documento é lido apenas quando consumido, então só um
+    documento fica em memória por vez durante a integração.
+    """
     if not os.path.exists(processed_dir):
         print(f"❌ Diretório não encontrado: {processed_dir}")
-        return documents
+        return
     
     # Carrega índice
     index_path = os.path.join(processed_dir, "index.json")
     if not os.path.exists(index_path):
         print(f"❌ Arquivo de índice não encontrado: {index_path}")
-        return documents
+        return
     
-    with open(index_path, 'r', encoding='utf-8') as f:
-        index = json.load(f)
+    index = _load_json(index_path)
     
     print(f"📋 Carregando {index['total_documents']} documentos processados...")
     
@@ -40,14 +67,11 @@ def load_processed_documents(processed_dir: str) -> List[Dict[str, Any]]:
         processed_file = os.path.join(processed_dir, doc_info['processed_filename'])
         
         if os.path.exists(processed_file):
-            with open(processed_file, 'r', encoding='utf-8') as f:
-                doc_data = json.load(f)
-                documents.append(doc_data)
-                print(f"✅ Carregado: {doc_info['filename']} ({doc_info['chunks']} chunks)")
+            doc_data = _load_json(processed_file)
+            print(f"✅ Carregado: {doc_info['filename']} ({doc_info['chunks']} chunks)")
+            yield doc_data
         else:
             print(f"⚠️  Arquivo não encontrado: {processed_file}")
-    
-    return documents
 
 def setup_chromadb(persist_dir: str = None) -> chromadb.Collection:
     """Configura e retorna a coleção ChromaDB"""
@@ -61,7 +85,10 @@ def setup_chromadb(persist_dir: str = None) -> chromadb.Collection:
     print(f"🔧 Configurando ChromaDB em: {persist_dir}")
     
     # Configura cliente ChromaDB
-    client = chromadb.PersistentClient(path=persist_dir)
+    client = chromadb.PersistentClient(
+        path=persist_dir,
+        settings=Settings(allow_reset=False)
+    )
     
     # Cria ou obtém coleção
     collection_name = "tributacao_internacional_rag"
@@ -74,16 +101,20 @@ def setup_chromadb(persist_dir: str = None) -> chromadb.Collection:
         # Cria nova coleção
         collection = client.create_collection(
             name=collection_name,
-            metadata={"description": "Base de conhecimento tributária com documentos RAG"}
+            metadata={
+                "description": "Base de conhecimento tributária com documentos RAG",
+                **HNSW_CONFIG
+            }
         )
         print(f"🆕 Nova coleção criada: {collection_name}")
     
     return collection
 
-def add_documents_to_chromadb(collection: chromadb.Collection, documents: List[Dict[str, Any]]) -> Dict[str, int]:
+def add_documents_to_chromadb(collection: chromadb.Collection, documents: Iterable[Dict[str, Any]]) -> Dict[str, int]:
     """Adiciona documentos à coleção ChromaDB"""
     
     stats = {
+        "total_documents": 0,
         "total_chunks": 0,
         "added_chunks": 0,
         "skipped_chunks": 0,
@@ -98,6 +129,7 @@ def add_documents_to_chromadb(collection: chromadb.Collection, documents: List[D
         chunks = doc['chunks']
         metadata = doc['metadata']
         
+        stats["total_documents"] += 1
         print(f"📄 Processando: {filename}")
         print(f"   📊 {len(chunks)} chunks para adicionar")
         
@@ -165,14 +197,15 @@ def integrate_rag_to_chromadb():
     chromadb_dir = "/Users/esausamuellimafeitosa/meus-projetos-claude/projetos-python/sistema-agentes-tributarios/data/chromadb"
     
     try:
-        # 1. Carrega documentos processados
+        # 1. Carrega documentos processados (sob demanda, um por vez)
         documents = load_processed_documents(processed_dir)
         
-        if not documents:
+        first_document = next(documents, None)
+        if first_document is None:
             print("❌ Nenhum documento foi carregado. Verifique o processamento anterior.")
             return
         
-        print(f"📚 {len(documents)} documentos carregados")
+        documents = chain([first_document], documents)
         print()
         
         # 2. Configura ChromaDB
@@ -186,6 +219,7 @@ def integrate_rag_to_chromadb():
         print("=" * 60)
         print("🎉 INTEGRAÇÃO CONCLUÍDA!")
         print(f"📊 Estatísticas:")
+        print(f"   • Documentos carregados: {stats['total_documents']}")
         print(f"   • Total de chunks processados: {stats['total_chunks']}")
         print(f"   • Chunks adicionados: {stats['added_chunks']}")
         print(f"   • Chunks com erro: {stats['error_chunks']}")
@@ -6,38 +6,23 @@ Powered by Agno Framework
 Entry point principal do sistema.
 """
 
+import logging
 import os
 import sys
+from importlib.util import find_spec
 from pathlib import Path
 
 # Carregar variáveis de ambiente
 from dotenv import load_dotenv
 load_dotenv()
 
-# Verificar dependências críticas
+# Dependências críticas (verificadas sem importar)
+REQUIRED_MODULES = ["rich", "openai", "chromadb", "pypdf"]
+
 def check_dependencies():
     """Verifica se dependências críticas estão instaladas."""
-    missing = []
-    
-    try:
-        import rich
-    except ImportError:
-        missing.append("rich")
-    
-    try:
-        import openai
-    except ImportError:
-        missing.append("openai")
-    
-    try:
-        import chromadb
-    except ImportError:
-        missing.append("chromadb")
-    
-    try:
-        import pypdf
-    except ImportError:
-        missing.append("pypdf")
+    # find_spec só localiza o pacote, sem pagar o custo de importá-lo (chromadb é pesado)
+    missing = [module for module in REQUIRED_MODULES if find_spec(module) is None]
     
     if missing:
         print(f"❌ Dependências ausentes: {', '.join(missing)}")
@@ -61,6 +46,9 @@ def check_environment():
 def main():
     """Ponto de entrada principal do sistema."""
     
+    # Mensagens de progresso dos módulos do core no terminal
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Verificações iniciais
     check_dependencies()
     check_environment()
@@ -4,7 +4,7 @@ Estruturas Pydantic para validação e organização dos dados.
 """
 
 from .document import Document, DocumentMetadata, DocumentType, SourceType
-from .chunk import Chunk, ChunkMetadata
+from .chunk import Chunk, ChunkCore, ChunkMetadata, to_chromadb_batch
 from .query import TaxQuery, QueryResponse
 from .country import Country, TaxJurisdiction
 
@@ -14,7 +14,9 @@ __all__ = [
     "DocumentType",
     "SourceType",
     "Chunk",
+    "ChunkCore",
     "ChunkMetadata",
+    "to_chromadb_batch",
     "TaxQuery",
     "QueryResponse",
     "Country",
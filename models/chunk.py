@@ -3,9 +3,22 @@ Modelos para chunks de texto processados.
 Unidades básicas de informação no sistema RAG.
 """
 
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Sequence, Union
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
+
+
+def _is_normalized_whitespace(text: str) -> bool:
+    """
+    Indica se o texto já está com os espaços normalizados.
+    
+    O único espaço imprimível é o ASCII (' '), então um texto imprimível sem
+    espaços duplicados nem nas pontas não muda com ' '.join(text.split()).
+    """
+    return text.isprintable() and "  " not in text and text[:1] != " " and text[-1:] != " "
 
 
 class ChunkMetadata(BaseModel):
@@ -33,17 +46,18 @@ class ChunkMetadata(BaseModel):
     text_quality: float = Field(1.0, ge=0.0, le=1.0, description="Qualidade do texto (0-1)")
     information_density: float = Field(0.5, ge=0.0, le=1.0, description="Densidade de informação")
     
-    @validator('detected_countries', 'detected_topics')
-    def normalize_detected_lists(cls, v):
+    @field_validator('detected_countries', 'detected_topics', mode='after')
+    @classmethod
+    def normalize_detected_lists(cls, v: List[str]) -> List[str]:
         """Normaliza listas detectadas."""
-        if v:
-            return list(set(item.lower().strip() for item in v if item.strip()))
-        return []
+        # Uma passada só, sem duplicatas e preservando a ordem de entrada
+        return list(dict.fromkeys(term for item in v if (term := item.strip().lower())))
     
-    @validator('end_char')
-    def validate_char_positions(cls, v, values):
+    @field_validator('end_char', mode='after')
+    @classmethod
+    def validate_char_positions(cls, v: int, info: ValidationInfo) -> int:
         """Valida posições dos caracteres."""
-        if 'start_char' in values and v <= values['start_char']:
+        if 'start_char' in info.data and v <= info.data['start_char']:
             raise ValueError("end_char deve ser maior que start_char")
         return v
 
@@ -68,47 +82,30 @@ class Chunk(BaseModel):
     # ChromaDB específico
     collection_name: str = Field("tax_knowledge", description="Nome da collection")
     
-    class Config:
-        """Configuração do modelo."""
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    # Pydantic v2 já serializa datetime em ISO 8601 no modo JSON
+    model_config = ConfigDict(validate_assignment=False)
     
-    @validator('id')
-    def validate_chunk_id(cls, v):
+    @field_validator('id', mode='after')
+    @classmethod
+    def validate_chunk_id(cls, v: str) -> str:
         """Valida formato do ID do chunk."""
         if not v or len(v) < 5:
             raise ValueError("ID do chunk deve ter pelo menos 5 caracteres")
         return v
     
-    @validator('text')
-    def validate_text_content(cls, v):
+    @field_validator('text', mode='after')
+    @classmethod
+    def validate_text_content(cls, v: str) -> str:
         """Valida conteúdo do texto."""
-        # Remove espaços excessivos
-        cleaned = ' '.join(v.split())
+        # Remove espaços excessivos (texto já normalizado é reaproveitado sem cópia)
+        cleaned = v if _is_normalized_whitespace(v) else ' '.join(v.split())
         if len(cleaned) < 50:
             raise ValueError("Chunk deve ter pelo menos 50 caracteres úteis")
         return cleaned
     
     def get_chromadb_format(self) -> Dict[str, Any]:
         """Retorna formato compatível com ChromaDB."""
-        return {
-            "ids": [self.id],
-            "documents": [self.text],
-            "metadatas": [{
-                "document_id": self.metadata.document_id,
-                "page_number": self.metadata.page_number,
-                "section": self.metadata.section or "",
-                "countries": ",".join(self.metadata.detected_countries),
-                "topics": ",".join(self.metadata.detected_topics),
-                "has_numbers": self.metadata.has_numbers,
-                "has_dates": self.metadata.has_dates,
-                "has_legal_refs": self.metadata.has_legal_refs,
-                "text_quality": self.metadata.text_quality,
-                "information_density": self.metadata.information_density,
-                "created_at": self.created_at.isoformat()
-            }]
-        }
+        return to_chromadb_batch([self])
     
     def calculate_relevance_score(self, query_countries: List[str] = None, 
                                  query_topics: List[str] = None) -> float:
@@ -130,4 +127,68 @@ class Chunk(BaseModel):
         # Penalizar baixa qualidade
         score *= self.metadata.text_quality
         
-        return min(score, 1.0)
\ No newline at end of file
+        return min(score, 1.0)
+
+
+@dataclass(frozen=True, slots=True)
+class ChunkCore:
+    """
+    Chunk já validado em representação enxuta e imutável.
+    
+    Usado entre o chunking e a indexação (inclusive na volta dos processos
+    de parse), onde a validação do Pydantic não é mais necessária.
+    """
+    id: str
+    text: str
+    metadata: ChunkMetadata
+    created_at: datetime
+    
+    @classmethod
+    def from_chunk(cls, chunk: Chunk) -> "ChunkCore":
+        """Cria a representação enxuta de um Chunk validado."""
+        return cls(chunk.id, chunk.text, chunk.metadata, chunk.created_at)
+
+
+# Chunks de um mesmo documento compartilham o timestamp: formata uma vez só
+_isoformat = lru_cache(maxsize=64)(datetime.isoformat)
+
+
+def _build_chromadb_metadata(chunk: Union[Chunk, ChunkCore]) -> Dict[str, Any]:
+    """Metadados do chunk no formato aceito pelo ChromaDB."""
+    metadata = chunk.metadata
+    return {
+        "document_id": metadata.document_id,
+        "page_number": metadata.page_number or 0,
+        "section": metadata.section or "",
+        "countries": ",".join(metadata.detected_countries),
+        "topics": ",".join(metadata.detected_topics),
+        "has_numbers": metadata.has_numbers,
+        "has_dates": metadata.has_dates,
+        "has_legal_refs": metadata.has_legal_refs,
+        "text_quality": metadata.text_quality,
+        "information_density": metadata.information_density,
+        "created_at": _isoformat(chunk.created_at),
+        "char_length": len(chunk.text)
+    }
+
+
+def to_chromadb_batch(chunks: Sequence[Union[Chunk, ChunkCore]]) -> Dict[str, List[Any]]:
+    """
+    Monta o lote no formato do add() do ChromaDB (ids, documents, metadatas).
+    
+    Percorre os chunks uma única vez, preenchendo as três listas em paralelo.
+    """
+    ids = []
+    documents = []
+    metadatas = []
+    ids_append = ids.append
+    documents_append = documents.append
+    metadatas_append = metadatas.append
+    
+    for chunk in chunks:
+        ids_append(chunk.id)
+        documents_append(chunk.text)
+        metadatas_append(_build_chromadb_metadata(chunk))
+    
+    return {"ids": ids, "documents": documents, "metadatas": metadatas}
+
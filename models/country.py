@@ -3,10 +3,18 @@ Modelos para países e jurisdições tributárias.
 Mapeamento e classificação de territórios fiscais.
 """
 
+import sys
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Mapping, Tuple
 from pydantic import BaseModel, Field, validator
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 
 class TaxRegimeType(str, Enum):
     """Tipos de regime tributário."""
@@ -123,7 +131,7 @@ class TaxJurisdiction(BaseModel):
 
 
 # Lista de países prioritários para o sistema
-PRIORITY_COUNTRIES = {
+PRIORITY_COUNTRIES: Mapping[str, Dict[str, str]] = MappingProxyType({
     "portugal": {"iso2": "PT", "iso3": "PRT", "region": "europa"},
     "espanha": {"iso2": "ES", "iso3": "ESP", "region": "europa"},
     "reino_unido": {"iso2": "GB", "iso3": "GBR", "region": "europa"},
@@ -139,7 +147,61 @@ PRIORITY_COUNTRIES = {
     "hong_kong": {"iso2": "HK", "iso3": "HKG", "region": "asia"},
     "emirados_arabes": {"iso2": "AE", "iso3": "ARE", "region": "middle_east"},
     "brasil": {"iso2": "BR", "iso3": "BRA", "region": "americas"}
-}
+})
+
+
+# Mapeamento de variações comuns (a ordem define a prioridade quando várias casam)
+_COUNTRY_VARIATIONS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "portugal": ("portugal", "pt", "portugues"),
+    "espanha": ("espanha", "spain", "es", "espanhol"),
+    "reino_unido": ("reino unido", "uk", "england", "inglaterra", "gb", "great britain"),
+    "estados_unidos": ("estados unidos", "usa", "us", "america", "eua"),
+    "suica": ("suiça", "switzerland", "ch", "swiss"),
+    "singapura": ("singapura", "singapore", "sg"),
+    "hong_kong": ("hong kong", "hk"),
+    "emirados_arabes": ("emirados", "uae", "dubai", "abu dhabi"),
+})
+
+
+def _build_variation_automaton():
+    """Constrói o automato Aho-Corasick variação -> (prioridade, código do país)"""
+    automato = ahocorasick.Automaton()
+    for priority, (country_code, variants) in enumerate(_COUNTRY_VARIATIONS.items()):
+        for variant in variants:
+            # Variação repetida entre países fica com o de maior prioridade
+            if variant not in automato:
+                automato.add_word(variant, (priority, country_code))
+    automato.make_automaton()
+    return automato
+
+
+_VARIATION_AUTOMATON = _build_variation_automaton() if AHOCORASICK_AVAILABLE else None
+
+
+def _scan_variations(name_lower: str) -> Optional[str]:
+    """Procura variações dentro do nome; vence o país listado primeiro."""
+    if _VARIATION_AUTOMATON is not None:
+        # Uma única passada sobre o nome
+        best = min(
+            (match for _, match in _VARIATION_AUTOMATON.iter(name_lower)),
+            default=None
+        )
+        return best[1] if best is not None else None
+    
+    for country_code, variants in _COUNTRY_VARIATIONS.items():
+        if any(variant in name_lower for variant in variants):
+            return country_code
+    
+    return None
+
+
+# Nome exatamente igual a uma variação (caso mais comum): o resultado é o da
+# varredura, pré-calculado (ex.: "estados unidos" contém "es" e resolve para espanha)
+_VARIANT_TO_CODE: Mapping[str, Optional[str]] = MappingProxyType({
+    sys.intern(variant): _scan_variations(variant)
+    for variants in _COUNTRY_VARIATIONS.values()
+    for variant in variants
+})
 
 
 def get_country_by_name(name: str) -> Optional[str]:
@@ -149,20 +211,8 @@ def get_country_by_name(name: str) -> Optional[str]:
     """
     name_lower = name.lower().strip()
     
-    # Mapeamento de variações comuns
-    variations = {
-        "portugal": ["portugal", "pt", "portugues"],
-        "espanha": ["espanha", "spain", "es", "espanhol"],
-        "reino_unido": ["reino unido", "uk", "england", "inglaterra", "gb", "great britain"],
-        "estados_unidos": ["estados unidos", "usa", "us", "america", "eua"],
-        "suica": ["suiça", "switzerland", "ch", "swiss"],
-        "singapura": ["singapura", "singapore", "sg"],
-        "hong_kong": ["hong kong", "hk"],
-        "emirados_arabes": ["emirados", "uae", "dubai", "abu dhabi"],
-    }
-    
-    for country_code, variants in variations.items():
-        if any(variant in name_lower for variant in variants):
-            return country_code
+    country_code = _VARIANT_TO_CODE.get(name_lower)
+    if country_code is not None:
+        return country_code
     
-    return None
\ No newline at end of file
+    return _scan_variations(name_lower)
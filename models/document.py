@@ -6,7 +6,7 @@ from datetime import datetime
 from enum import Enum
 from pathlib import Path
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class DocumentType(str, Enum):
@@ -62,15 +62,16 @@ class DocumentMetadata(BaseModel):
     total_pages: Optional[int] = Field(None, ge=1, description="Total de páginas")
     file_size_mb: Optional[float] = Field(None, ge=0.0, description="Tamanho em MB")
     
-    @validator('countries', 'regions', 'topics', 'keywords')
-    def normalize_lists(cls, v):
+    @field_validator('countries', 'regions', 'topics', 'keywords', mode='after')
+    @classmethod
+    def normalize_lists(cls, v: List[str]) -> List[str]:
         """Normaliza listas removendo duplicatas e convertendo para lowercase."""
-        if v:
-            return list(set(item.lower().strip() for item in v if item.strip()))
-        return []
+        # Uma passada só, sem duplicatas e preservando a ordem de entrada
+        return list(dict.fromkeys(term for item in v if (term := item.strip().lower())))
     
-    @validator('confidence_level')
-    def validate_confidence(cls, v):
+    @field_validator('confidence_level', mode='after')
+    @classmethod
+    def validate_confidence(cls, v: float) -> float:
         """Valida nível de confiança."""
         return round(v, 2)
 
@@ -94,23 +95,20 @@ class Document(BaseModel):
     chunks_count: int = Field(0, ge=0, description="Número de chunks gerados")
     embedded: bool = Field(False, description="Se foi incorporado ao vector DB")
     
-    class Config:
-        """Configuração do modelo."""
-        arbitrary_types_allowed = True
-        json_encoders = {
-            Path: str,
-            datetime: lambda v: v.isoformat()
-        }
+    # Pydantic v2 já serializa Path como str e datetime em ISO 8601 no modo JSON
+    model_config = ConfigDict(arbitrary_types_allowed=True, validate_assignment=False)
     
-    @validator('id')
-    def validate_id(cls, v):
+    @field_validator('id', mode='after')
+    @classmethod
+    def validate_id(cls, v: str) -> str:
         """Valida formato do ID."""
         if not v or len(v) < 3:
             raise ValueError("ID deve ter pelo menos 3 caracteres")
         return v.lower().replace(" ", "_")
     
-    @validator('file_path')
-    def validate_file_path(cls, v):
+    @field_validator('file_path', mode='after')
+    @classmethod
+    def validate_file_path(cls, v: Path) -> Path:
         """Valida se o arquivo existe."""
         if not isinstance(v, Path):
             v = Path(v)
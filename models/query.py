@@ -116,6 +116,7 @@ class QueryResponse(BaseModel):
     # Metadados da busca
     search_results_count: int = Field(..., ge=0, description="Chunks encontrados")
     processing_time_ms: int = Field(..., ge=0, description="Tempo de processamento")
+    degraded_search: bool = Field(False, description="Busca feita sem embedding válido ou com erro")
     
     # Referência à query original
     original_query: TaxQuery = Field(..., description="Query original")
@@ -76,13 +76,17 @@ class ChunkingTools:
         # Processar e enriquecer chunks
         processed_chunks = []
         
+        # Um único timestamp por documento, compartilhado pelos chunks
+        created_at = datetime.now()
+        
         for i, raw_chunk in enumerate(raw_chunks):
             chunk_metadata = self._analyze_chunk(raw_chunk, document, i)
             
             chunk = Chunk(
                 id=self._generate_chunk_id(document.id, i),
                 text=raw_chunk,
-                metadata=chunk_metadata
+                metadata=chunk_metadata,
+                created_at=created_at
             )
             
             processed_chunks.append(chunk)
@@ -377,7 +381,8 @@ class ChunkingTools:
                 current_chunk = Chunk(
                     id=current_chunk.id,  # Manter ID original
                     text=combined_text,
-                    metadata=combined_metadata
+                    metadata=combined_metadata,
+                    created_at=current_chunk.created_at
                 )
             else:
                 # Adicionar chunk atual e avançar
@@ -3,6 +3,7 @@ Processador especializado para documentos PDF tributários.
 Extração inteligente com preservação de estrutura.
 """
 
+import mmap
 import re
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
@@ -18,6 +19,10 @@ except ImportError:
 from ..models.document import Document, DocumentMetadata, DocumentType, SourceType
 
 
+# Arquivos acima deste tamanho são lidos via mmap (evita carregar tudo na RSS)
+MMAP_THRESHOLD_BYTES = 100 * 1024 * 1024
+
+
 class PDFPageInfo(BaseModel):
     """Informações de uma página PDF."""
     page_number: int
@@ -95,44 +100,86 @@ class PDFProcessor:
     
     def _extract_pages(self, file_path: Path) -> List[PDFPageInfo]:
         """Extrai informações de todas as páginas."""
-        pages_info = []
-        
         try:
             with open(file_path, 'rb') as file:
-                reader = PdfReader(file)
-                
-                for page_num, page in enumerate(reader.pages, 1):
-                    try:
-                        # Extrair texto da página
-                        raw_text = page.extract_text()
-                        cleaned_text = self._clean_page_text(raw_text)
-                        
-                        # Analisar características da página
-                        page_info = PDFPageInfo(
-                            page_number=page_num,
-                            text=cleaned_text,
-                            char_count=len(cleaned_text),
-                            has_tables=self._detect_tables(cleaned_text),
-                            has_headers=self._detect_headers(cleaned_text),
-                            quality_score=self._calculate_quality_score(cleaned_text)
-                        )
-                        
-                        pages_info.append(page_info)
-                        
-                    except Exception as e:
-                        # Página com problema - criar placeholder
-                        placeholder = PDFPageInfo(
-                            page_number=page_num,
-                            text=f"[ERRO: Página {page_num} não pôde ser processada: {str(e)}]",
-                            char_count=0,
-                            quality_score=0.0
-                        )
-                        pages_info.append(placeholder)
+                if file_path.stat().st_size > MMAP_THRESHOLD_BYTES:
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as stream:
+                        return self._read_pages(stream)
+                return self._read_pages(file)
                         
         except Exception as e:
             raise Exception(f"Erro ao processar PDF {file_path}: {str(e)}")
+    
+    def _read_pages(self, stream) -> List[PDFPageInfo]:
+        """Lê as páginas de um stream PDF."""
+        reader = PdfReader(stream)
+        return [
+            self._extract_page_info(page, page_num)
+            for page_num, page in enumerate(reader.pages, 1)
+        ]
+    
+    def _extract_page_info(self, page, page_num: int) -> PDFPageInfo:
+        """Extrai texto e características de uma página."""
+        try:
+            # Página só com imagens (ex.: digitalizada): não há texto a extrair,
+            # então o conteúdo comprimido nem é decodificado
+            if self._is_image_only_page(page):
+                return PDFPageInfo(
+                    page_number=page_num,
+                    text="",
+                    char_count=0,
+                    quality_score=0.0
+                )
+            
+            # Extrair texto da página
+            raw_text = page.extract_text()
+            cleaned_text = self._clean_page_text(raw_text)
+            
+            # Analisar características da página
+            return PDFPageInfo(
+                page_number=page_num,
+                text=cleaned_text,
+                char_count=len(cleaned_text),
+                has_tables=self._detect_tables(cleaned_text),
+                has_headers=self._detect_headers(cleaned_text),
+                quality_score=self._calculate_quality_score(cleaned_text)
+            )
+            
+        except Exception as e:
+            # Página com problema - criar placeholder
+            return PDFPageInfo(
+                page_number=page_num,
+                text=f"[ERRO: Página {page_num} não pôde ser processada: {str(e)}]",
+                char_count=0,
+                quality_score=0.0
+            )
+    
+    def _is_image_only_page(self, page) -> bool:
+        """
+        Detecta páginas sem fontes, cujos XObjects são todos imagens.
         
-        return pages_info
+        Na dúvida (recursos ausentes ou ilegíveis) a página é tratada como texto.
+        """
+        try:
+            resources = page.get("/Resources")
+            if resources is None:
+                return False
+            resources = resources.get_object()
+            
+            if resources.get("/Font"):
+                return False
+            
+            xobjects = resources.get("/XObject")
+            if not xobjects:
+                return False
+            
+            # Form XObjects podem conter texto com fontes próprias
+            return all(
+                xobject.get_object().get("/Subtype") == "/Image"
+                for xobject in xobjects.get_object().values()
+            )
+        except Exception:
+            return False
     
     def _clean_page_text(self, raw_text: str) -> str:
         """Limpa texto extraído de uma página."""